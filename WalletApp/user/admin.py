@@ -1,53 +1,124 @@
-from django.contrib import admin
-from .forms import *
-from .models import User, Wallet, Transaction
-from django.contrib.auth.admin import UserAdmin
-# Register your models here.
-class CustomUserAdmin(UserAdmin):
-    add_form = CustomUserCreationForm
-    model = User
-
-    list_display = ('email', 'name','is_staff', 'is_active', 'email_verified',)
-    list_filter = ('email', 'is_staff', 'is_active',)
-    fieldsets = (
-        (None, {'fields': ('email', 'password', 'email_verified',)}),
-        # ('Personal Info', {'fields': ('created_by',)}),
-        ('Permissions', {'fields': ('is_staff', 'is_active')}),
-    )
-    add_fieldsets = (
-        (None, {
-            'classes': ('wide',),
-            'fields': ('name', 'email', 'password1', 'password2', 'is_staff', 'is_active', 'is_delete', 'email_verified')}
-        ),
-    )
-    search_fields = ('email',)
-    ordering = ('email',)
-    filter_horizontal = ()
-
-admin.site.register(User, CustomUserAdmin)
-
-@admin.register(Wallet)
-class WalletAdmin(admin.ModelAdmin):
-    list_display = (
-        "user", "balance", "usd_balance", "created_at", "updated_at"
-    )
-
-    class Meta:
-        model = Wallet
-
-@admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
-    list_display = (
-        "sender",
-        "receiver",
-        "amount",
-        "from_currency",
-        "to_currency",
-        "exchange_rate",
-        "transaction_type",
-        "ip_address",
-        "created_at",
-    )
-
-    class Meta:
-        model = Transaction
\ No newline at end of file
+from django.contrib import admin
+from .forms import *
+from .models import User, Wallet, WalletBalance, Transaction, IdempotencyKey, DailyTransactionSummary, OutboxEvent
+from django.contrib.auth.admin import UserAdmin
+from . import money, outbox
+
+def major_units(field):
+    """A list_display column showing a minor-unit `field` in major units."""
+    @admin.display(description=field.replace('_', ' '), ordering=field)
+    def column(obj):
+        return money.to_major(getattr(obj, field))
+    column.__name__ = field
+    return column
+
+# Register your models here.
+class CustomUserAdmin(UserAdmin):
+    add_form = CustomUserCreationForm
+    model = User
+
+    list_display = ('email', 'name','is_staff', 'is_active', 'email_verified',)
+    list_filter = ('email', 'is_staff', 'is_active',)
+    fieldsets = (
+        (None, {'fields': ('email', 'password', 'email_verified',)}),
+        # ('Personal Info', {'fields': ('created_by',)}),
+        ('Permissions', {'fields': ('is_staff', 'is_active')}),
+    )
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('name', 'email', 'password1', 'password2', 'is_staff', 'is_active', 'is_delete', 'email_verified')}
+        ),
+    )
+    search_fields = ('email',)
+    ordering = ('email',)
+    filter_horizontal = ()
+
+admin.site.register(User, CustomUserAdmin)
+
+class WalletBalanceInline(admin.TabularInline):
+    # Balances only change through transfers, which also write the ledger.
+    model = WalletBalance
+    fields = readonly_fields = ("currency", major_units("amount"), "updated_at")
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+@admin.register(Wallet)
+class WalletAdmin(admin.ModelAdmin):
+    list_display = (
+        "user", "created_at", "updated_at"
+    )
+    inlines = (WalletBalanceInline,)
+
+    class Meta:
+        model = Wallet
+
+@admin.register(Transaction)
+class TransactionAdmin(admin.ModelAdmin):
+    list_display = (
+        "sender",
+        "receiver",
+        major_units("amount"),
+        major_units("converted_amount"),
+        "from_currency",
+        "to_currency",
+        "exchange_rate",
+        "ip_address",
+        "created_at",
+    )
+
+    class Meta:
+        model = Transaction
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "key",
+        "status_code",
+        "created_at",
+        "expires_at",
+    )
+    search_fields = ("key",)
+
+    class Meta:
+        model = IdempotencyKey
+
+@admin.register(DailyTransactionSummary)
+class DailyTransactionSummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "day",
+        "currency",
+        "transaction_type",
+        "count",
+        major_units("amount"),
+    )
+    list_filter = ("transaction_type", "currency")
+
+    class Meta:
+        model = DailyTransactionSummary
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "topic",
+        "attempts",
+        "available_at",
+        "failed_at",
+        "created_at",
+    )
+    list_filter = ("topic", ("failed_at", admin.EmptyFieldListFilter))
+    readonly_fields = ("payload", "last_error")
+    actions = ("retry_events",)
+
+    @admin.action(description="Retry selected events")
+    def retry_events(self, request, queryset):
+        self.message_user(request, f"Queued {outbox.retry(queryset)} events again.")
+
+    class Meta:
+        model = OutboxEvent
@@ -1,6 +1,17 @@
-from django.apps import AppConfig
-
-
-class UserConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'user'
+from django.apps import AppConfig
+
+
+class UserConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'user'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from . import authentication  # noqa: F401 -- connects the user cache signals
+        from . import checks  # noqa: F401 -- registers the system checks
+        from . import metrics
+        from . import summaries  # noqa: F401 -- registers its outbox handler
+
+        if settings.METRICS_ENABLED:
+            connection_created.connect(metrics.instrument_connection)
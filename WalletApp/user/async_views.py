@@ -0,0 +1,216 @@
+"""
+Async versions of the wallet, transfer and transaction views, served under
+/api/async/ when the app runs on ASGI. Authentication and permissions run in
+a worker thread (adrf); everything else awaits the async ORM and the async
+exchange client, so a slow rate provider no longer holds a thread.
+"""
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from adrf.views import APIView
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .models import User, Wallet, Transaction
+from .pagination import TransactionListPagination, TransactionCursorPagination
+from .response_handler import ResponseHandler
+from .serializers import TransferSerializer, TransactionListSerializer, TransactionPageSerializer, WalletSerializer
+from .routers import reads_from_replica
+from .views import TransferView
+from django.db import close_old_connections
+from . import exchange, idempotency, money, throttling, transfers, wallet_cache
+
+
+def in_worker_thread(func):
+    """
+    Run `func` in the default executor instead of the single thread shared by
+    the async ORM, so transfers from concurrent requests don't queue behind
+    each other. Each call gets a fresh connection check, like a sync request.
+    """
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+class AsyncWalletView(APIView):
+    permission_classes = [IsAuthenticated]
+    response_handler = ResponseHandler()
+    serializer_class = WalletSerializer
+
+    @reads_from_replica
+    async def get(self, request):
+        async def load():
+            balances = await Wallet.objects.abalances_of(request.user.pk)
+            return dict(self.serializer_class({'user': request.user.pk, 'balances': balances}).data)
+
+        try:
+            data = await wallet_cache.aget_wallet_data(request.user.pk, load=load)
+            response_dict, status_code = self.response_handler.success(
+                data=data,
+                msg="Wallet fetched successfully.",
+            )
+            return Response(response_dict, status=status_code)
+        except Wallet.DoesNotExist:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error="Wallet not found.", msg="Wallet not found."
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in AsyncWalletView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e), msg="Something went wrong."
+            )
+            return Response(response_dict, status=status_code)
+
+
+class AsyncTransferView(APIView):
+    serialize_class = TransferSerializer
+    permission_classes = [IsAuthenticated]
+    response_handler = ResponseHandler()
+    throttle_scope = 'transfer'
+
+    get_client_ip = TransferView.get_client_ip
+    get_exchange_rate = TransferView.get_exchange_rate
+    # A keyed transfer has to commit together with its stored response, so
+    # it runs the sync view's code in a single worker thread.
+    sync_transfer = TransferView.transfer
+
+    async def post(self, request):
+        with throttling.transfer_slots.slot():
+            key = request.headers.get(idempotency.HEADER)
+            if key:
+                return await in_worker_thread(idempotency.run)(request, key, self.sync_transfer)
+            return await self.transfer(request)
+
+    async def transfer(self, request):
+        serializer = self.serialize_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        receiver_email = serializer.validated_data['receiver_email']
+        amount = serializer.validated_data['amount']
+        from_currency = serializer.validated_data['from_currency']
+        to_currency = serializer.validated_data['to_currency']
+
+        try:
+            receiver = await User.objects.aget(email=receiver_email)
+
+            exchange_rate = await exchange.aget_exchange_rate(from_currency, to_currency)
+            converted_amount = money.convert(amount, exchange_rate)
+            if converted_amount <= 0:
+                response_dict, status_code = self.response_handler.error(
+                    data=None, error=None, msg="Amount is too small to convert."
+                )
+                return Response(response_dict, status=status_code)
+
+            # The locked read-modify-write stays a synchronous atomic block.
+            await in_worker_thread(transfers.execute_transfer)(
+                sender=request.user,
+                receiver=receiver,
+                amount=amount,
+                converted_amount=converted_amount,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                exchange_rate=exchange_rate,
+                ip_address=self.get_client_ip(request),
+            )
+
+            response_dict, status_code = self.response_handler.success(
+                data={},
+                msg="Transfer successfully.",
+            )
+            return Response(response_dict, status=status_code)
+
+        except transfers.InsufficientBalance as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error={}, msg=str(e)
+            )
+            return Response(response_dict, status=status_code)
+        except User.DoesNotExist as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="Receiver not found"
+            )
+            return Response(response_dict, status=status_code)
+        except Wallet.DoesNotExist as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="Wallet not found."
+            )
+            return Response(response_dict, status=status_code)
+        except exchange.ExchangeRateError as e:
+            response_dict, status_code = self.response_handler.exception(
+                data=None, error=str(e), msg="Exchange rate is currently unavailable.",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in AsyncTransferView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e),
+            )
+            return Response(response_dict, status=status_code)
+
+
+class AsyncTransactionListView(APIView):
+    permission_classes = (IsAuthenticated,)
+    response_handler = ResponseHandler()
+    serializer_class = TransactionListSerializer
+
+    pagination_class = TransactionListPagination
+    cursor_pagination_class = TransactionCursorPagination
+    page_size = 10
+
+    @reads_from_replica
+    async def get(self, request):
+        try:
+            type_filter = request.query_params.get('type')
+            if type_filter in ['sent', 'received']:
+                queryset = Transaction.objects.history(request.user, type_filter.upper())
+            else:
+                queryset = Transaction.objects.history(request.user)
+
+            for param, lookup in (('date_from', 'created_at__gte'), ('date_to', 'created_at__lte')):
+                value = request.query_params.get(param)
+                if value:
+                    try:
+                        queryset = queryset.filter(**{lookup: datetime.strptime(value, '%Y-%m-%d')})
+                    except ValueError as e:
+                        response_dict, status_code = self.response_handler.error(
+                            data=None, error=str(e), msg=f"Invalid {param} format."
+                        )
+                        return Response(response_dict, status=status_code)
+
+            if 'cursor' in request.query_params:
+                paginator = self.cursor_pagination_class()
+                paginator.page_size = self.page_size
+                page = await paginator.apaginate_queryset(queryset, request)
+                users = await TransactionPageSerializer.users_queryset().ain_bulk(
+                    TransactionPageSerializer.user_ids(page)
+                )
+                serializer = self.serializer_class(page, many=True, context={'request': request, 'users': users})
+                return paginator.get_paginated_response(serializer.data)
+
+            # Page numbers need Django's sync Paginator; run the page in a thread.
+            return await sync_to_async(self.paginate_by_number)(queryset, request)
+
+        except NotFound as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e.detail), msg="Invalid cursor."
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in AsyncTransactionListView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e), msg="Something went wrong."
+            )
+            return Response(response_dict, status=status_code)
+
+    def paginate_by_number(self, queryset, request):
+        paginator = self.pagination_class()
+        paginator.page_size = self.page_size
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.serializer_class(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
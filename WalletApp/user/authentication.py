@@ -0,0 +1,66 @@
+from django.core.cache import caches
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import User
+
+USER_KEY = "auth:user:{}"
+# In model field order, as Model.from_db expects.
+USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in ('id', 'email', 'is_active', 'is_staff')
+)
+
+
+def get_cache():
+    return caches['auth']
+
+
+def invalidate_user(user_id):
+    get_cache().delete(USER_KEY.format(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user query.
+
+    The token is verified as usual; the user's id, email and flags come
+    from the in-process `auth` cache (AUTH_USER_CACHE_TTL seconds) and the
+    database is only read on a miss. The returned user has just those
+    fields loaded; any other field is fetched when first accessed.
+    Entries are dropped when the user is saved or deleted in this process
+    or logs out through TokenBlacklistView; other processes pick up the
+    change when their entry expires.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        cache = get_cache()
+        key = USER_KEY.format(user_id)
+        values = cache.get(key)
+        if values is None:
+            try:
+                row = User.objects.values(*USER_FIELDS).get(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            values = [row[field] for field in USER_FIELDS]
+            cache.set(key, values)
+
+        user = User.from_db(router.db_for_read(User), USER_FIELDS, values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
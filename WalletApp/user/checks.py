@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn about what runs per process when the workers don't share a cache."""
+    if settings.CACHE_SHARED_BY_WORKERS:
+        return []
+    effects = ["GET /api/wallet isn't cached"]
+    if settings.DATABASE_REPLICAS:
+        effects.append("reads stay on the primary instead of DB_REPLICA_HOSTS")
+    if any(settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {}).values()):
+        effects.append(f"clients can make {settings.WEB_CONCURRENCY} times the THROTTLE_* rates")
+    return [
+        Warning(
+            f"WEB_CONCURRENCY is {settings.WEB_CONCURRENCY} but the default cache is per process, so "
+            f"{', '.join(effects[:-1])}{' and ' if len(effects) > 1 else ''}{effects[-1]}.",
+            hint="Set REDIS_URL to share the cache between the workers.",
+            id='user.W001',
+        ),
+    ]
@@ -0,0 +1,314 @@
+import asyncio
+import threading
+import time
+from decimal import Decimal
+
+import httpx
+import requests
+from decouple import config
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from . import metrics
+
+EXCHANGE_API = config('EXCHANGE_API')
+
+
+class ExchangeRateError(Exception):
+    pass
+
+
+class CircuitOpenError(ExchangeRateError):
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    Stops calling a failing provider after `failure_threshold` consecutive
+    failures. After `reset_timeout` seconds a single trial call is let
+    through; its outcome closes or re-opens the circuit.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """Give up a trial call that ended without an outcome; the next call is a trial again."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+class ExchangeClient(object):
+    def __init__(self, base_url, connect_timeout, read_timeout, pool_size, breaker):
+        self.base_url = base_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch_rate(self, from_currency, to_currency):
+        if not self.breaker.allow():
+            metrics.exchange_failures.inc('circuit_open')
+            raise CircuitOpenError("Exchange rate provider is unavailable")
+        started = time.perf_counter()
+        try:
+            response = self.session.get(
+                self.base_url,
+                params={'from': from_currency, 'to': to_currency},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            rate = Decimal(str(response.json()['rates'][to_currency]))
+        except Exception as e:
+            self.breaker.record_failure()
+            metrics.exchange_fetch_duration.observe(time.perf_counter() - started, 'error')
+            metrics.exchange_failures.inc('error')
+            raise ExchangeRateError("Failed to fetch exchange rate") from e
+        self.breaker.record_success()
+        metrics.exchange_fetch_duration.observe(time.perf_counter() - started, 'ok')
+        return rate
+
+
+class AsyncExchangeClient(object):
+    """
+    Non-blocking counterpart of ExchangeClient for the async views. It shares
+    the circuit breaker of the sync client, so both paths back off together.
+    """
+    def __init__(self, base_url, connect_timeout, read_timeout, pool_size, breaker):
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.breaker = breaker
+        self._clients = {}
+
+    def get_session(self):
+        # Pooled connections belong to the event loop that opened them.
+        loop = asyncio.get_running_loop()
+        session = self._clients.get(loop)
+        if session is None:
+            self._clients = {key: value for key, value in self._clients.items() if not key.is_closed()}
+            session = self._clients[loop] = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return session
+
+    async def fetch_rate(self, from_currency, to_currency):
+        if not self.breaker.allow():
+            metrics.exchange_failures.inc('circuit_open')
+            raise CircuitOpenError("Exchange rate provider is unavailable")
+        started = time.perf_counter()
+        try:
+            response = await self.get_session().get(
+                self.base_url,
+                params={'from': from_currency, 'to': to_currency},
+            )
+            response.raise_for_status()
+            rate = Decimal(str(response.json()['rates'][to_currency]))
+        except Exception as e:
+            self.breaker.record_failure()
+            metrics.exchange_fetch_duration.observe(time.perf_counter() - started, 'error')
+            metrics.exchange_failures.inc('error')
+            raise ExchangeRateError("Failed to fetch exchange rate") from e
+        except BaseException:
+            # Cancelled while waiting for the provider.
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+        metrics.exchange_fetch_duration.observe(time.perf_counter() - started, 'ok')
+        return rate
+
+
+class _InFlight(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.rate = None
+        self.error = None
+
+
+class ExchangeRateCache(object):
+    """
+    Per-process cache of exchange rates keyed by (from_currency, to_currency).
+
+    Concurrent misses for the same pair are collapsed into a single upstream
+    fetch; the other callers wait for the leader's result. When the fetch
+    fails, the last known good rate is served if it is at most
+    `max_staleness` seconds old.
+    """
+
+    def __init__(self, ttl, max_staleness=0):
+        self.ttl = ttl
+        self.max_staleness = max_staleness
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'coalesced': 0, 'stale_served': 0, 'errors': 0}
+
+    def get(self, from_currency, to_currency, fetch):
+        key = (from_currency, to_currency)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self.stats['hits'] += 1
+                return entry[0]
+            call = self._inflight.get(key)
+            if call is None:
+                call = self._inflight[key] = _InFlight()
+                leader = True
+                self.stats['stale' if entry is not None else 'misses'] += 1
+            else:
+                leader = False
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.rate
+
+        fresh = False
+        try:
+            call.rate = fetch(from_currency, to_currency)
+            fresh = True
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.stats['errors'] += 1
+                if entry is not None and time.monotonic() - entry[1] <= self.max_staleness:
+                    self.stats['stale_served'] += 1
+                    call.rate, call.error = entry[0], None
+            if call.error is not None:
+                raise
+        finally:
+            with self._lock:
+                if fresh:
+                    self._entries[key] = (call.rate, time.monotonic())
+                del self._inflight[key]
+            call.event.set()
+        return call.rate
+
+    async def aget(self, from_currency, to_currency, fetch):
+        """
+        Async variant of `get` for coroutine `fetch` functions. Misses are
+        coalesced per event loop; entries and stats are shared with `get`.
+        """
+        key = (from_currency, to_currency)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self.stats['hits'] += 1
+                return entry[0]
+            future = self._inflight.get((loop, key))
+            if future is None:
+                future = self._inflight[(loop, key)] = loop.create_future()
+                leader = True
+                self.stats['stale' if entry is not None else 'misses'] += 1
+            else:
+                leader = False
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        rate = error = None
+        try:
+            rate = await fetch(from_currency, to_currency)
+            with self._lock:
+                self._entries[key] = (rate, time.monotonic())
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+                if entry is not None and time.monotonic() - entry[1] <= self.max_staleness:
+                    self.stats['stale_served'] += 1
+                    rate = entry[0]
+            if rate is None:
+                error = e
+                raise
+        finally:
+            # Also when the leader is cancelled, so waiters never hang on the future.
+            with self._lock:
+                del self._inflight[(loop, key)]
+            if rate is not None:
+                future.set_result(rate)
+            else:
+                future.set_exception(error or ExchangeRateError("Exchange rate fetch was cancelled"))
+                future.exception()  # waiters may be gone; don't warn about it
+        return rate
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+breaker = CircuitBreaker(
+    failure_threshold=settings.EXCHANGE_BREAKER_FAILURES,
+    reset_timeout=settings.EXCHANGE_BREAKER_RESET_TIMEOUT,
+)
+client = ExchangeClient(
+    EXCHANGE_API,
+    connect_timeout=settings.EXCHANGE_CONNECT_TIMEOUT,
+    read_timeout=settings.EXCHANGE_READ_TIMEOUT,
+    pool_size=settings.EXCHANGE_POOL_SIZE,
+    breaker=breaker,
+)
+async_client = AsyncExchangeClient(
+    EXCHANGE_API,
+    connect_timeout=settings.EXCHANGE_CONNECT_TIMEOUT,
+    read_timeout=settings.EXCHANGE_READ_TIMEOUT,
+    pool_size=settings.EXCHANGE_POOL_SIZE,
+    breaker=breaker,
+)
+rate_cache = ExchangeRateCache(
+    ttl=settings.EXCHANGE_RATE_CACHE_TTL,
+    max_staleness=settings.EXCHANGE_RATE_MAX_STALENESS,
+)
+
+metrics.CallbackMetric(
+    'wallet_exchange_rate_cache_events_total', 'counter', "Exchange-rate cache lookups by result.", ('event',),
+    lambda: {(event,): count for event, count in rate_cache.stats.items()},
+)
+metrics.CallbackMetric(
+    'wallet_exchange_circuit_open', 'gauge', "1 while calls to the exchange-rate provider are cut off.", (),
+    lambda: {(): int(breaker.state == CircuitBreaker.OPEN)},
+)
+
+
+def get_exchange_rate(from_currency, to_currency):
+    if from_currency == to_currency:
+        return Decimal("1.0")
+    return rate_cache.get(from_currency, to_currency, client.fetch_rate)
+
+
+async def aget_exchange_rate(from_currency, to_currency):
+    if from_currency == to_currency:
+        return Decimal("1.0")
+    return await rate_cache.aget(from_currency, to_currency, async_client.fetch_rate)
@@ -0,0 +1,55 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Fixed rates, so benchmark runs convert the same amounts every time.
+RATES = {
+    ('USD', 'INR'): '83.25',
+    ('INR', 'USD'): '0.012',
+}
+
+
+class ExchangeStubHandler(BaseHTTPRequestHandler):
+    """Answers GET ?from=&to= the way EXCHANGE_API does: {"rates": {to: rate}}."""
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        pair = (query.get('from', [''])[0], query.get('to', [''])[0])
+        if self.latency:
+            time.sleep(self.latency)
+        if pair not in RATES:
+            self.reply(404, {'error': f"Unknown currency pair {pair[0]}/{pair[1]}"})
+        else:
+            self.reply(200, {'rates': {pair[1]: float(RATES[pair])}})
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start(host='127.0.0.1', port=0, latency=0.0):
+    """
+    Serve the stub from a daemon thread and return the server; its URL is
+    `url(server)`. `latency` seconds are added to every response.
+    """
+    handler = type('ExchangeStubHandler', (ExchangeStubHandler,), {'latency': latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/latest"
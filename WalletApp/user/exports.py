@@ -0,0 +1,84 @@
+import csv
+import json
+from datetime import datetime
+from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from .models import Transaction
+from . import money
+
+USER_FIELDS = (
+    'id', 'created_at', 'transaction_type', 'sender_email', 'receiver_email', 'leg_amount',
+    'from_currency', 'to_currency', 'exchange_rate',
+)
+ALL_FIELDS = (
+    'id', 'created_at', 'sender_email', 'receiver_email', 'amount', 'converted_amount',
+    'from_currency', 'to_currency', 'exchange_rate', 'ip_address',
+)
+MONEY_FIELDS = ('leg_amount', 'amount', 'converted_amount')
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+class Echo(object):
+    def write(self, value):
+        return value
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """
+    Amounts and rates as JSON numbers, as the API renders them. Times keep
+    their microseconds, like the CSV and the API, where DjangoJSONEncoder
+    would cut them to milliseconds.
+    """
+
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def values(row, fields):
+    return [money.to_major(row[field]) if field in MONEY_FIELDS else row[field] for field in fields]
+
+
+def filter_created_at(queryset, date_from=None, date_to=None):
+    if date_from:
+        queryset = queryset.filter(created_at__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__lte=date_to)
+    return queryset
+
+
+def user_rows(user, transaction_type=None, date_from=None, date_to=None):
+    """The history of `user`, as the transaction list shows it."""
+    history = filter_created_at(Transaction.objects.history(user, transaction_type), date_from, date_to)
+    return USER_FIELDS, history.annotate(
+        sender_email=F('sender__email'), receiver_email=F('receiver__email')
+    ).values(*USER_FIELDS)
+
+
+def all_rows(date_from=None, date_to=None):
+    """Every transfer, one row each."""
+    queryset = filter_created_at(Transaction.objects.all(), date_from, date_to)
+    return ALL_FIELDS, queryset.annotate(
+        sender_email=F('sender__email'), receiver_email=F('receiver__email')
+    ).values(*ALL_FIELDS).order_by('created_at', 'id')
+
+
+def render(fields, rows, output_format, chunk_size):
+    """
+    Yield the export line by line. Rows are read through a server-side
+    cursor `chunk_size` at a time, so memory use does not grow with the
+    number of rows exported.
+    """
+    if output_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields)
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield writer.writerow(values(row, fields))
+    else:
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield json.dumps(dict(zip(fields, values(row, fields))), cls=ExportEncoder) + '\n'
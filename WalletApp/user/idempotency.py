@@ -0,0 +1,91 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .models import IdempotencyKey
+from .renderers import ORJSONRenderer
+from .response_handler import ResponseHandler
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+response_handler = ResponseHandler()
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path} {body}".encode()).hexdigest()
+
+
+def run(request, key, handler):
+    """
+    Run `handler(request)` at most once per (user, key).
+
+    The first request claims the key and holds its row lock until the
+    transfer and its stored response commit together. A duplicate that
+    arrives meanwhile blocks on that lock and then replays the stored
+    response; if the first request died, the duplicate takes over. 5xx
+    responses are not stored, so those requests can be retried.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        response_dict, status_code = response_handler.error(
+            data=None, error=None, msg=f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."
+        )
+        return Response(response_dict, status=status_code)
+
+    request_fingerprint = fingerprint(request)
+    now = timezone.now()
+    record, _ = IdempotencyKey.objects.get_or_create(
+        user=request.user,
+        key=key,
+        defaults={
+            'fingerprint': request_fingerprint,
+            'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+        },
+    )
+
+    with transaction.atomic():
+        record = IdempotencyKey.objects.select_for_update().filter(pk=record.pk).first()
+        if record is None:
+            # Purged while we waited; start over with a fresh claim.
+            return run(request, key, handler)
+        if record.expires_at <= now:
+            record.fingerprint = request_fingerprint
+            record.status_code = record.response = None
+            record.expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+            record.save(update_fields=['fingerprint', 'status_code', 'response', 'expires_at'])
+
+        if record.fingerprint != request_fingerprint:
+            response_dict, status_code = response_handler.exception(
+                data=None, error=None, msg=f"{HEADER} was already used for a different request.",
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+            return Response(response_dict, status=status_code)
+
+        if record.status_code is not None:
+            return Response(json.loads(record.response), status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+        response = handler(request)
+        if response.status_code < 500:
+            record.status_code = response.status_code
+            record.response = ORJSONRenderer().render(response.data).decode()
+            record.save(update_fields=['status_code', 'response'])
+        return response
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys in batches; returns the number of rows removed."""
+    deleted = 0
+    while True:
+        pks = list(
+            IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,59 @@
+import atexit
+import threading
+import time
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import User
+
+
+class LastLoginBuffer(object):
+    """
+    Collects `last_login` timestamps and writes them with one bulk UPDATE
+    every LAST_LOGIN_FLUSH_INTERVAL seconds from a background thread, so a
+    login does not wait on a write. With an interval of 0 the timestamp is
+    written right away. Timestamps still pending when a process is killed
+    are lost; `last_login` is informational only.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, user):
+        now = timezone.now()
+        user.last_login = now
+        if settings.LAST_LOGIN_FLUSH_INTERVAL <= 0:
+            User.objects.filter(pk=user.pk).update(last_login=now)
+            return
+        with self._lock:
+            self._pending[user.pk] = now
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-login-flush', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            User.objects.bulk_update(
+                [User(pk=pk, last_login=timestamp) for pk, timestamp in pending.items()],
+                ['last_login'],
+            )
+        return len(pending)
+
+    def _run(self):
+        while True:
+            time.sleep(settings.LAST_LOGIN_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Exception in LastLoginBuffer: \n {e}")
+            finally:
+                connection.close()
+
+
+buffer = LastLoginBuffer()
+record = buffer.record
+atexit.register(buffer.flush)
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from user import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Take monthly transaction partitions older than --older-than-months out of the transaction "
+        "table: detach them as tables of their own, or move their rows to the archive table. "
+        "Daily summaries of those months are kept; rebuild_transaction_summaries leaves them alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-months", type=int, default=settings.TRANSACTION_RETENTION_MONTHS)
+        parser.add_argument("--mode", choices=partitions.ARCHIVE_MODES, default="detach")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError("The transaction table is not partitioned; this needs PostgreSQL.")
+        this_month = partitions.month_start(timezone.now().date())
+        before = partitions.add_months(this_month, -options["older_than_months"])
+        if options["dry_run"]:
+            names = [name for month, name in sorted(partitions.partitions().items()) if month < before]
+            self.stdout.write(f"Would {options['mode']} {len(names)} partitions: {', '.join(names) or '-'}")
+            return
+        removed = partitions.archive(before, options["mode"])
+        for name in removed:
+            self.stdout.write(f"{'Detached' if options['mode'] == 'detach' else 'Archived'} {name}")
+        self.stdout.write(self.style.SUCCESS(f"Removed {len(removed)} partitions from {partitions.table()}."))
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+import httpx
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from user import exchange, exchange_stub, money, summaries
+from user.models import OutboxEvent, User, Transaction, Wallet, WalletBalance
+
+SENDER_EMAIL = "bench-sender@example.com"
+RECEIVER_EMAIL = "bench-receiver@example.com"
+# The names the bench users are created with, by email.
+BENCH_USERS = {SENDER_EMAIL: "bench-sender", RECEIVER_EMAIL: "bench-receiver"}
+PASSWORD = "bench-Passw0rd!"
+SCENARIOS = ("login", "wallet", "transfer_same", "transfer_cross", "history_deep")
+METRICS = ("throughput", "p50_ms", "p95_ms", "p99_ms", "queries_per_request")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark login, wallet reads, same- and cross-currency transfers and deep transaction "
+        "paging, in-process or over HTTP against a running server, with a local stand-in for "
+        "EXCHANGE_API. Reports throughput, p50/p95/p99 latency and queries per request, and "
+        "compares them with the stored baseline of the target."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=("inprocess", "http"), default="inprocess")
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000/api", help="Server for --target http.")
+        parser.add_argument("--async", dest="use_async", action="store_true", help="Use the /api/async/ views.")
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated scenarios.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--login-requests", type=int, default=20, help="Requests for login, which hashes a password.")
+        parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight with --target http.")
+        parser.add_argument("--history", type=int, default=5000, help="Transactions seeded for history_deep.")
+        parser.add_argument(
+            "--exchange-port", type=int, default=8765,
+            help="Port of the exchange-rate stub with --target http; start the server with "
+                 "EXCHANGE_API=http://127.0.0.1:<port>/latest.",
+        )
+        parser.add_argument("--exchange-latency", type=float, default=0.0, help="Seconds added to each stub response.")
+        parser.add_argument("--baseline", help="Baseline file (default: benchmarks/<target>[-async].json).")
+        parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline.")
+        parser.add_argument(
+            "--max-regression", type=float,
+            help="Fail if a p95 latency grows by more than this percentage, or queries per request grow at all.",
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}. Choose from {', '.join(SCENARIOS)}.")
+        name = f"{options['target']}-async" if options["use_async"] else options["target"]
+        baseline_path = Path(options["baseline"] or settings.BASE_DIR / "benchmarks" / f"{name}.json")
+
+        if options["target"] == "http":
+            stub = exchange_stub.start(port=options["exchange_port"], latency=options["exchange_latency"])
+        else:
+            stub = exchange_stub.start(latency=options["exchange_latency"])
+        sender, receiver = self.seed(options["history"])
+        try:
+            if options["target"] == "http":
+                results = asyncio.run(self.run_http(scenarios, options))
+            else:
+                results = self.run_inprocess(scenarios, exchange_stub.url(stub), options)
+        finally:
+            self.clean_up([sender.pk, receiver.pk])
+            stub.shutdown()
+
+        self.report(results)
+        run = {
+            "target": options["target"],
+            "async": options["use_async"],
+            "requests": options["requests"],
+            "concurrency": options["concurrency"] if options["target"] == "http" else 1,
+            "history": options["history"],
+            "scenarios": results,
+        }
+        regressions = []
+        if baseline_path.exists() and not options["save_baseline"]:
+            regressions = self.compare(json.loads(baseline_path.read_text()), run, options["max_regression"])
+        elif not options["save_baseline"]:
+            self.stdout.write(f"No baseline at {baseline_path}; store one with --save-baseline.")
+        if options["save_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(run, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+        if regressions:
+            raise CommandError(f"Regressions against {baseline_path}: {', '.join(regressions)}")
+
+    def seed(self, history):
+        """A sender with funds in every currency and `history` transfers, and a receiver."""
+        existing = User.objects.filter(email__in=BENCH_USERS)
+        for user in existing:
+            if user.name != BENCH_USERS[user.email]:
+                raise CommandError(f"{user.email} belongs to a user the benchmark didn't create; not touching it.")
+        # Left behind by a run that was killed.
+        self.clean_up([user.pk for user in existing])
+        sender = User.objects.create_user(email=SENDER_EMAIL, password=PASSWORD, name=BENCH_USERS[SENDER_EMAIL])
+        receiver = User.objects.create_user(email=RECEIVER_EMAIL, password=PASSWORD, name=BENCH_USERS[RECEIVER_EMAIL])
+        wallets = Wallet.objects.bulk_create([Wallet(user=sender), Wallet(user=receiver)])
+        funds = {sender.pk: money.to_minor(10 ** 9)}
+        WalletBalance.objects.bulk_create([
+            WalletBalance(wallet=wallet, currency=currency, amount=funds.get(wallet.user_id, 0))
+            for wallet in wallets for currency in settings.WALLET_CURRENCIES
+        ])
+        Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    sender=sender, receiver=receiver, amount=100, converted_amount=100,
+                    from_currency="INR", to_currency="INR", exchange_rate=1, ip_address="127.0.0.1",
+                )
+                for _ in range(history)
+            ],
+            batch_size=2000,
+        )
+        return sender, receiver
+
+    def clean_up(self, user_ids):
+        """Delete the bench users and the summary events their transfers left in the outbox."""
+        legs = Q()
+        for user_id in user_ids:
+            legs |= Q(payload__transactions__contains=[{"sender_id": user_id}])
+            legs |= Q(payload__transactions__contains=[{"receiver_id": user_id}])
+        if legs:
+            OutboxEvent.objects.filter(legs, topic=summaries.TOPIC).delete()
+        User.objects.filter(pk__in=user_ids).delete()
+
+    def requests_for(self, scenario, options):
+        """(method, path, body) of one request of `scenario`."""
+        prefix = "async/" if options["use_async"] else ""
+        transfer = {"receiver_email": RECEIVER_EMAIL, "amount": "0.01"}
+        if scenario == "login":
+            return "POST", "login", {"email": SENDER_EMAIL, "password": PASSWORD}
+        if scenario == "wallet":
+            return "GET", f"{prefix}wallet", None
+        if scenario == "transfer_same":
+            return "POST", f"{prefix}transfer", {**transfer, "from_currency": "INR", "to_currency": "INR"}
+        if scenario == "transfer_cross":
+            return "POST", f"{prefix}transfer", {**transfer, "from_currency": "USD", "to_currency": "INR"}
+        # The transfers above add to the history; stay on a page that exists.
+        return "GET", f"{prefix}transactions?page={max(options['history'] // 10, 1)}", None
+
+    def count_for(self, scenario, options):
+        return options["login_requests"] if scenario == "login" else options["requests"]
+
+    def run_inprocess(self, scenarios, stub_url, options):
+        # Measure the views, not how soon the throttles refuse them.
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {}}):
+            return self.run_scenarios_inprocess(scenarios, stub_url, options)
+
+    def run_scenarios_inprocess(self, scenarios, stub_url, options):
+        client = Client()
+        response = client.post("/api/login", {"email": SENDER_EMAIL, "password": PASSWORD}, content_type="application/json")
+        if response.status_code != 200:
+            raise CommandError(f"Login failed: {response.status_code} {response.content.decode()}")
+        headers = {"Authorization": f"Bearer {response.json()['data']['access']}"}
+
+        base_urls = exchange.client.base_url, exchange.async_client.base_url
+        exchange.client.base_url = exchange.async_client.base_url = stub_url
+        exchange.rate_cache.clear()
+        results = {}
+        try:
+            for scenario in scenarios:
+                method, path, body = self.requests_for(scenario, options)
+                latencies, queries, errors = [], 0, 0
+                total = self.count_for(scenario, options)
+                started = time.perf_counter()
+                for _ in range(total):
+                    request_started = time.perf_counter()
+                    with CaptureQueriesContext(connection) as captured:
+                        response = client.generic(
+                            method, f"/api/{path}", json.dumps(body) if body else "",
+                            content_type="application/json", headers=headers,
+                        )
+                    latencies.append((time.perf_counter() - request_started) * 1000)
+                    queries += len(captured)
+                    errors += response.status_code != 200
+                results[scenario] = self.summarize(total, time.perf_counter() - started, latencies, errors, queries)
+        finally:
+            exchange.client.base_url, exchange.async_client.base_url = base_urls
+            exchange.rate_cache.clear()
+        return results
+
+    async def run_http(self, scenarios, options):
+        base_url = options["base_url"].rstrip("/")
+        concurrency = options["concurrency"]
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
+            response = await client.post(f"{base_url}/login", json={"email": SENDER_EMAIL, "password": PASSWORD})
+            if response.status_code != 200:
+                raise CommandError(f"Login failed: {response.status_code} {response.text}")
+            client.headers["Authorization"] = f"Bearer {response.json()['data']['access']}"
+
+            results = {}
+            for scenario in scenarios:
+                method, path, body = self.requests_for(scenario, options)
+                latencies, errors = [], 0
+                total = self.count_for(scenario, options)
+                remaining = iter(range(total))
+
+                async def worker():
+                    nonlocal errors
+                    for _ in remaining:
+                        request_started = time.perf_counter()
+                        try:
+                            response = await client.request(method, f"{base_url}/{path}", json=body)
+                            errors += response.status_code != 200
+                        except httpx.HTTPError:
+                            errors += 1
+                        latencies.append((time.perf_counter() - request_started) * 1000)
+
+                started = time.perf_counter()
+                await asyncio.gather(*[worker() for _ in range(concurrency)])
+                # The server's queries can't be counted from here.
+                results[scenario] = self.summarize(total, time.perf_counter() - started, latencies, errors, None)
+        return results
+
+    def summarize(self, total, elapsed, latencies, errors, queries):
+        return {
+            "requests": total,
+            "errors": errors,
+            "throughput": round(total / elapsed, 1),
+            "p50_ms": round(self.percentile(latencies, 50), 2),
+            "p95_ms": round(self.percentile(latencies, 95), 2),
+            "p99_ms": round(self.percentile(latencies, 99), 2),
+            "queries_per_request": round(queries / total, 2) if queries is not None else None,
+        }
+
+    def percentile(self, values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'scenario':<15} {'requests':>8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'errors':>7}"
+        )
+        for scenario, result in results.items():
+            queries = result["queries_per_request"]
+            self.stdout.write(
+                f"{scenario:<15} {result['requests']:>8} {result['throughput']:>9.1f} {result['p50_ms']:>8.2f} "
+                f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{'-' if queries is None else f'{queries:.2f}':>8} {result['errors']:>7}"
+            )
+
+    def compare(self, baseline, run, max_regression):
+        """Print each metric's change against `baseline`; return the regressions."""
+        for key in ("target", "async", "requests", "concurrency", "history"):
+            if baseline.get(key) != run[key]:
+                self.stdout.write(self.style.WARNING(
+                    f"Baseline was run with {key}={baseline.get(key)}, this run with {key}={run[key]}."
+                ))
+        self.stdout.write(f"\n{'vs baseline':<15} " + " ".join(f"{metric:>24}" for metric in METRICS))
+        regressions = []
+        for scenario, result in run["scenarios"].items():
+            before = baseline["scenarios"].get(scenario)
+            if before is None:
+                continue
+            changes = []
+            for metric in METRICS:
+                old, new = before.get(metric), result[metric]
+                if old is None or new is None:
+                    changes.append(f"{'-':>24}")
+                    continue
+                percent = (new - old) / old * 100 if old else 0.0
+                changes.append(f"{f'{old:g} -> {new:g} ({percent:+.0f}%)':>24}")
+                if max_regression is not None and (
+                    (metric == "p95_ms" and percent > max_regression)
+                    or (metric == "queries_per_request" and new > old)
+                ):
+                    regressions.append(f"{scenario} {metric}")
+            self.stdout.write(f"{scenario:<15} " + " ".join(changes))
+        return regressions
@@ -0,0 +1,102 @@
+import asyncio
+import statistics
+import time
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+ENDPOINTS = {
+    "wallet": ("GET", "wallet"),
+    "transactions": ("GET", "transactions"),
+    "transfer": ("POST", "transfer"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a running server with concurrent requests and report throughput and latency per "
+        "concurrency level. Run it once against the WSGI deployment and once against the ASGI one "
+        "(--async targets the /api/async/ views) to compare how many requests a process can keep in flight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000/api")
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--endpoint", choices=ENDPOINTS, default="wallet")
+        parser.add_argument("--async", dest="use_async", action="store_true", help="Use the /api/async/ views.")
+        parser.add_argument("--concurrency", default="1,10,50,100", help="Comma separated concurrency levels.")
+        parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level.")
+        parser.add_argument("--receiver-email", help="Receiver for --endpoint transfer.")
+        parser.add_argument("--amount", default="0.01")
+        parser.add_argument("--from-currency", default="USD")
+        parser.add_argument("--to-currency", default="INR")
+        parser.add_argument("--timeout", type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        if options["endpoint"] == "transfer" and not options["receiver_email"]:
+            raise CommandError("--receiver-email is required for --endpoint transfer.")
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma separated list of integers.")
+        asyncio.run(self.run(levels, options))
+
+    async def run(self, levels, options):
+        base_url = options["base_url"].rstrip("/")
+        method, path = ENDPOINTS[options["endpoint"]]
+        url = f"{base_url}/async/{path}" if options["use_async"] else f"{base_url}/{path}"
+        body = None
+        if method == "POST":
+            body = {
+                "receiver_email": options["receiver_email"],
+                "amount": options["amount"],
+                "from_currency": options["from_currency"],
+                "to_currency": options["to_currency"],
+            }
+
+        limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+        async with httpx.AsyncClient(timeout=options["timeout"], limits=limits) as client:
+            response = await client.post(
+                f"{base_url}/login", json={"email": options["email"], "password": options["password"]}
+            )
+            if response.status_code != 200:
+                raise CommandError(f"Login failed: {response.status_code} {response.text}")
+            client.headers["Authorization"] = f"Bearer {response.json()['data']['access']}"
+
+            self.stdout.write(f"{method} {url}")
+            self.stdout.write(f"{'concurrency':>11} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+            for level in levels:
+                throughput, latencies, errors = await self.run_level(
+                    client, method, url, body, level, options["requests"]
+                )
+                self.stdout.write(
+                    f"{level:>11} {throughput:>9.1f} {self.percentile(latencies, 50):>8.1f} "
+                    f"{self.percentile(latencies, 95):>8.1f} {self.percentile(latencies, 99):>8.1f} {errors:>7}"
+                )
+
+    async def run_level(self, client, method, url, body, concurrency, total):
+        latencies = []
+        errors = 0
+        remaining = iter(range(total))
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, url, json=body)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+        return total / elapsed, latencies, errors
+
+    def percentile(self, values, percent):
+        if len(values) < 2:
+            return values[0] if values else 0.0
+        return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
@@ -0,0 +1,77 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from user.models import User, Transaction
+from user.renderers import ORJSONRenderer
+from user.response_handler import ResponseHandler
+from user.serializers import TransactionListSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time serializing and rendering one /api/transactions page with DRF's JSONRenderer and "
+        "with the orjson renderer. Runs against seeded rows that are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Rows on the page.")
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self.seed(options["rows"])
+                page = list(Transaction.objects.history(user)[:options["rows"]])
+                self.report(page, options["repeat"])
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        sender, receiver = User.objects.bulk_create([
+            User(email="render-sender@example.com", name="render-sender"),
+            User(email="render-receiver@example.com", name="render-receiver"),
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(
+                sender=sender, receiver=receiver, amount=1050, converted_amount=87412,
+                from_currency="USD", to_currency="INR", exchange_rate=83.25, ip_address="127.0.0.1",
+            )
+            for _ in range(rows)
+        ])
+        return sender
+
+    def report(self, page, repeat):
+        response_handler = ResponseHandler()
+
+        def serialize():
+            data = TransactionListSerializer(page, many=True).data
+            return response_handler.success(data={"count": len(page), "results": data})[0]
+
+        body = serialize()
+        timings = {
+            "serialize": self.time(serialize, repeat),
+            "render (JSONRenderer)": self.time(lambda: JSONRenderer().render(body), repeat),
+            "render (ORJSONRenderer)": self.time(lambda: ORJSONRenderer().render(body), repeat),
+        }
+        self.stdout.write(f"{len(page)} rows, median of {repeat} runs")
+        for name, seconds in timings.items():
+            self.stdout.write(f"  {name:<26} {seconds * 1000:8.2f} ms")
+        self.stdout.write(
+            f"  {'total before':<26} {(timings['serialize'] + timings['render (JSONRenderer)']) * 1000:8.2f} ms\n"
+            f"  {'total after':<26} {(timings['serialize'] + timings['render (ORJSONRenderer)']) * 1000:8.2f} ms"
+        )
+
+    def time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+        return statistics.median(samples)
@@ -0,0 +1,33 @@
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from user import partitions
+
+
+def parse_month(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Invalid month: {value}. Use YYYY-MM.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly transaction partitions up to --months-ahead months from now. "
+        "Run it at least monthly, e.g. from cron, so new transfers never land in the default partition."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=settings.TRANSACTION_PARTITION_MONTHS_AHEAD)
+        parser.add_argument(
+            "--from", dest="start", type=parse_month,
+            help="First month (YYYY-MM) to create; rows already in the default partition are moved.",
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError("The transaction table is not partitioned; this needs PostgreSQL.")
+        created = partitions.ensure_partitions(options["months_ahead"], options["start"])
+        for month in created:
+            self.stdout.write(f"Created {partitions.partition_name(month)}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} partitions."))
@@ -0,0 +1,122 @@
+import re
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from user import partitions
+from user.models import User, Transaction
+
+
+class Rollback(Exception):
+    pass
+
+
+def sequential_scans(plan):
+    """
+    Sequential scans of the transaction table or its partitions in `plan`,
+    ignoring empty partitions, which the planner always scans that way.
+    """
+    table = re.escape(Transaction._meta.db_table)
+    scans = re.findall(rf"Seq Scan on ({table}\w*) .*?cost=[\d.]+\.\.([\d.]+)", plan)
+    return [relation for relation, cost in scans if float(cost) > 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the transaction history queries and fail if any of them scans the whole "
+        "transaction table. With --seed, runs against a synthetic table that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Number of transactions to seed.")
+        parser.add_argument("--users", type=int, default=1000, help="Number of users to seed.")
+        parser.add_argument("--email", help="Explain the history of this user instead of a seeded one.")
+        parser.add_argument("--verbose-plans", action="store_true")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plans can only be checked on PostgreSQL.")
+        try:
+            with transaction.atomic():
+                user = None
+                if options["seed"]:
+                    user = self.seed(options["users"], options["seed"])
+                if options["email"]:
+                    user = User.objects.get(email=options["email"])
+                elif user is None:
+                    user = User.objects.filter(sent_transactions__isnull=False).first()
+                if user is None:
+                    raise CommandError("No user with transactions found; use --seed.")
+                failures = self.check_plans(user, options["verbose_plans"])
+                if options["seed"]:
+                    raise Rollback()
+        except Rollback:
+            pass
+        if failures:
+            raise CommandError(f"Sequential scan on the transaction table in: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All transaction history queries use index scans."))
+
+    def seed(self, users, rows):
+        """
+        Seed `rows` random transfers between `users` new users, a tenth of
+        them sent by the first one. Returns that heavy user.
+        """
+        created = User.objects.bulk_create(
+            [User(email=f"plan-{i}@example.com", name=f"plan-{i}") for i in range(users)]
+        )
+        first, last = created[0].pk, created[-1].pk
+        if partitions.is_partitioned():
+            partitions.ensure_partitions(
+                settings.TRANSACTION_PARTITION_MONTHS_AHEAD, start=timezone.now() - timedelta(days=730)
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Transaction._meta.db_table}
+                    (sender_id, receiver_id, amount, converted_amount, from_currency, to_currency,
+                     exchange_rate, ip_address, created_at)
+                SELECT CASE WHEN n %% 10 = 0 THEN %s ELSE %s + (random() * (%s - %s))::bigint END,
+                       %s + (random() * (%s - %s))::bigint,
+                       1000, 1000, 'INR', 'INR', 1, '127.0.0.1', now() - random() * interval '730 days'
+                FROM generate_series(1, %s) AS n
+                """,
+                [first, first, last, first, first, last, first, rows],
+            )
+            cursor.execute(f"ANALYZE {Transaction._meta.db_table}")
+        return created[0]
+
+    def check_plans(self, user, verbose):
+        now = timezone.now()
+        range_start = now - timedelta(days=30)
+        history = Transaction.objects.history(user)
+        last = history[500:501].first() or Transaction(created_at=now, pk=0)
+        before = Q(created_at__lte=last.created_at) & (Q(created_at__lt=last.created_at) | Q(id__lt=last.pk))
+        queries = {
+            "first page": history[:11],
+            "deep page": history[500:510],
+            "cursor page": history.filter(before)[:11],
+            "sent": Transaction.objects.history(user, "SENT")[:11],
+            "received": Transaction.objects.history(user, "RECEIVED")[:11],
+            "date range": history.filter(created_at__gte=range_start)[:11],
+        }
+        # Monthly partitions the date range query should prune away.
+        pruned = [
+            name for month, name in partitions.partitions().items()
+            if partitions.bound(partitions.add_months(month, 1)) <= range_start
+        ] if partitions.is_partitioned() else []
+        failures = []
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            if verbose:
+                self.stdout.write(f"-- {name}\n{plan}\n")
+            if sequential_scans(plan):
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: sequential scan"))
+            elif name == "date range" and any(f" on {partition} " in plan for partition in pruned):
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: scans partitions outside the range"))
+            else:
+                self.stdout.write(f"{name}: ok")
+        return failures
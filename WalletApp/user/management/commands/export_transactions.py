@@ -0,0 +1,50 @@
+import sys
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from user.models import User
+from user import exports
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise CommandError(f"Invalid date: {value}. Use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Stream the transaction history to a CSV or NDJSON file without loading it into memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=exports.FORMATS, default="csv")
+        parser.add_argument("--output", help="File to write to. Defaults to stdout.")
+        parser.add_argument("--email", help="Export the history of this user only.")
+        parser.add_argument("--type", choices=["sent", "received"], help="Only with --email.")
+        parser.add_argument("--date-from", type=parse_date)
+        parser.add_argument("--date-to", type=parse_date)
+        parser.add_argument("--chunk-size", type=int, default=settings.EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options["email"]:
+            try:
+                user = User.objects.get(email=options["email"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['email']} not found.")
+            transaction_type = options["type"].upper() if options["type"] else None
+            fields, rows = exports.user_rows(user, transaction_type, options["date_from"], options["date_to"])
+        else:
+            fields, rows = exports.all_rows(options["date_from"], options["date_to"])
+
+        out = open(options["output"], "w", newline="") if options["output"] else sys.stdout
+        count = 0
+        try:
+            for line in exports.render(fields, rows, options["format"], options["chunk_size"]):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if options["output"]:
+            rows_written = count - 1 if options["format"] == "csv" else count
+            self.stdout.write(self.style.SUCCESS(f"Exported {rows_written} transactions to {options['output']}"))
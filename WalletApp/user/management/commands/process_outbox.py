@@ -0,0 +1,35 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from user import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Handle outbox events left by transfers, in batches, retrying failures with backoff. "
+        "Runs until stopped; start as many workers as needed, they skip each other's events."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when nothing is due.")
+        parser.add_argument("--once", action="store_true", help="Exit once no event is due.")
+
+    def handle(self, *args, **options):
+        total_handled = total_failed = 0
+        try:
+            while True:
+                close_old_connections()
+                handled, failed = outbox.process_batch(options["batch_size"])
+                total_handled += handled
+                total_failed += failed
+                if failed:
+                    self.stderr.write(f"{failed} events failed and will be retried or were given up on.")
+                if handled + failed < options["batch_size"]:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Handled {total_handled} events, {total_failed} failures."))
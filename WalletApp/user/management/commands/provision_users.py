@@ -0,0 +1,55 @@
+import json
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from user import provisioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users and wallets in bulk from a CSV (with a header row) or JSON Lines file. "
+        "Columns: email, name, and password or password_hash. Wallets start empty."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=provisioning.FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=settings.PROVISIONING_CHUNK_SIZE)
+        parser.add_argument("--workers", type=int, default=settings.PROVISIONING_WORKERS,
+                            help="Password hashing processes; 0 uses one per CPU.")
+        parser.add_argument("--report", help="Write duplicate and invalid records to this JSON file.")
+
+    def handle(self, *args, **options):
+        input_format = options["format"] or provisioning.detect_format(options["path"])
+        started = time.perf_counter()
+
+        def progress(report):
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"created {report.created} ({report.created / elapsed:.0f}/s), "
+                f"duplicates {len(report.duplicates)}, invalid {len(report.invalid)}"
+            )
+
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as lines:
+                report = provisioning.provision(
+                    provisioning.read_records(lines, input_format),
+                    chunk_size=options["chunk_size"],
+                    workers=options["workers"],
+                    progress=progress,
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if options["report"]:
+            with open(options["report"], "w") as out:
+                json.dump({"duplicates": report.duplicates, "invalid": report.invalid}, out, indent=2)
+        elif report.duplicates or report.invalid:
+            for email in report.duplicates:
+                self.stdout.write(self.style.WARNING(f"duplicate: {email}"))
+            for record in report.invalid:
+                self.stdout.write(self.style.WARNING(f"invalid: {record}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report.created} users in {time.perf_counter() - started:.1f}s; "
+            f"{len(report.duplicates)} duplicates, {len(report.invalid)} invalid."
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from user import idempotency
+
+
+class Command(BaseCommand):
+    help = "Delete expired idempotency keys. Run it periodically, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys."))
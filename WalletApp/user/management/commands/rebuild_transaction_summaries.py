@@ -0,0 +1,39 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from user import summaries
+from user.models import DailyTransactionSummary
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f"Invalid date: {value}. Use YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily transaction summaries from the transaction table, for all days or "
+        "for a range. Run it once after deploying them to backfill existing transfers. Days in "
+        "months taken out of the table by archive_transactions keep their summaries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", type=parse_date)
+        parser.add_argument("--date-to", type=parse_date)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        first_day = summaries.first_live_day()
+        try:
+            written = summaries.rebuild(options["date_from"], options["date_to"], options["batch_size"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        kept = first_day and (options["date_from"] is None or options["date_from"] < first_day)
+        if kept and DailyTransactionSummary.objects.filter(day__lt=first_day).exists():
+            self.stdout.write(f"Kept the summaries before {first_day}, whose transfers are archived.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} summary rows in {time.perf_counter() - started:.1f}s."
+        ))
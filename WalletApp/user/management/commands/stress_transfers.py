@@ -0,0 +1,92 @@
+import random
+import threading
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+from user.models import User, Wallet, WalletBalance
+from user import money, transfers
+
+EMAIL_TEMPLATE = "stress-{}@example.com"
+
+
+class Command(BaseCommand):
+    help = "Run concurrent transfers between a small set of wallets and verify the final balances."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wallets", type=int, default=10)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--transfers", type=int, default=2000)
+        parser.add_argument("--balance", type=int, default=1000)
+        parser.add_argument("--keep", action="store_true", help="Keep the stress users after the run.")
+
+    def handle(self, *args, **options):
+        users = self.setup_users(options["wallets"], options["balance"])
+        expected_total = money.to_minor(options["balance"]) * len(users)
+        per_thread = options["transfers"] // options["threads"]
+        results = {"ok": 0, "insufficient": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            counts = {"ok": 0, "insufficient": 0, "errors": 0}
+            try:
+                for _ in range(per_thread):
+                    sender, receiver = rng.sample(users, 2)
+                    amount = money.to_minor(rng.randint(1, 300))
+                    try:
+                        transfers.execute_transfer(
+                            sender, receiver, amount, amount, "INR", "INR", Decimal("1.0"), "127.0.0.1"
+                        )
+                        counts["ok"] += 1
+                    except transfers.InsufficientBalance:
+                        counts["insufficient"] += 1
+                    except Exception as e:
+                        counts["errors"] += 1
+                        self.stderr.write(f"Transfer failed: {e}")
+            finally:
+                connection.close()
+            with lock:
+                for key, value in counts.items():
+                    results[key] += value
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        balances = WalletBalance.objects.filter(wallet__user__in=users, currency="INR")
+        total = balances.aggregate(total=Sum("amount"))["total"]
+        negative = balances.filter(amount__lt=0).count()
+        attempted = per_thread * options["threads"]
+
+        self.stdout.write(
+            f"transfers: {attempted} in {elapsed:.2f}s ({attempted / elapsed:.1f}/s) "
+            f"ok={results['ok']} insufficient={results['insufficient']} errors={results['errors']}"
+        )
+        self.stdout.write(
+            f"total balance: {money.to_major(total)} (expected {money.to_major(expected_total)}), "
+            f"negative wallets: {negative}"
+        )
+        consistent = total == expected_total and not negative and not results["errors"]
+
+        if not options["keep"]:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+        if consistent:
+            self.stdout.write(self.style.SUCCESS("Balances are consistent."))
+        else:
+            self.stdout.write(self.style.ERROR("Balances are inconsistent."))
+
+    def setup_users(self, count, balance):
+        emails = [EMAIL_TEMPLATE.format(i) for i in range(count)]
+        User.objects.filter(email__in=emails).delete()
+        users = User.objects.bulk_create([User(email=email, name=email.split("@")[0]) for email in emails])
+        wallets = Wallet.objects.bulk_create([Wallet(user=user) for user in users])
+        WalletBalance.objects.bulk_create(
+            [WalletBalance(wallet=wallet, currency="INR", amount=money.to_minor(balance)) for wallet in wallets]
+        )
+        return users
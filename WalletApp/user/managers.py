@@ -1,30 +1,140 @@
-from django.contrib.auth.base_user import BaseUserManager
-from django.utils.translation import gettext_lazy as _
-from django.contrib.auth import authenticate
-
-class CustomUserManager(BaseUserManager):
-    def create_user(self, email, password, **extra_fields):
-       if not email:
-           raise ValueError(_("The email must be set"))
-       if not password:
-           raise ValueError(_("The password must be set"))
-       email = self.normalize_email(email)
-
-       user = self.model(email=email, **extra_fields)
-       user.set_password(password)
-       user.save()
-       return user
-
-    def create_superuser(self, email, password, **extra_fields):
-        """
-        Create and save a SuperUser with the given email and password.
-        """
-        extra_fields.setdefault('is_staff', True)
-        extra_fields.setdefault('is_superuser', True)
-        extra_fields.setdefault('is_active', True)
-
-        if extra_fields.get('is_staff') is not True:
-            raise ValueError(_('Superuser must have is_staff=True.'))
-        if extra_fields.get('is_superuser') is not True:
-            raise ValueError(_('Superuser must have is_superuser=True.'))
-        return self.create_user(email, password, **extra_fields)
\ No newline at end of file
+from django.contrib.auth.base_user import BaseUserManager
+from django.db import models
+from django.db.models import F, Value
+from django.utils.translation import gettext_lazy as _
+from django.contrib.auth import authenticate
+
+class CustomUserManager(BaseUserManager):
+    def create_user(self, email, password, **extra_fields):
+       if not email:
+           raise ValueError(_("The email must be set"))
+       if not password:
+           raise ValueError(_("The password must be set"))
+       email = self.normalize_email(email)
+
+       user = self.model(email=email, **extra_fields)
+       user.set_password(password)
+       user.save()
+       return user
+
+    def create_superuser(self, email, password, **extra_fields):
+        """
+        Create and save a SuperUser with the given email and password.
+        """
+        extra_fields.setdefault('is_staff', True)
+        extra_fields.setdefault('is_superuser', True)
+        extra_fields.setdefault('is_active', True)
+
+        if extra_fields.get('is_staff') is not True:
+            raise ValueError(_('Superuser must have is_staff=True.'))
+        if extra_fields.get('is_superuser') is not True:
+            raise ValueError(_('Superuser must have is_superuser=True.'))
+        return self.create_user(email, password, **extra_fields)
+
+class MergedQuerySet(object):
+    """
+    Ordered UNION ALL over disjoint querysets, with enough of the QuerySet
+    API for filtering and pagination. Slicing pushes the LIMIT into every
+    branch, so PostgreSQL merges the branches' index scans instead of
+    sorting all of their rows.
+    """
+    ordered = True
+
+    def __init__(self, querysets, ordering=('-created_at', '-id')):
+        self.querysets = list(querysets)
+        self.ordering = tuple(ordering)
+
+    def _apply(self, method, *args, **kwargs):
+        return MergedQuerySet(
+            [getattr(qs, method)(*args, **kwargs) for qs in self.querysets], self.ordering
+        )
+
+    def filter(self, *args, **kwargs):
+        return self._apply('filter', *args, **kwargs)
+
+    def annotate(self, *args, **kwargs):
+        return self._apply('annotate', *args, **kwargs)
+
+    def values(self, *fields):
+        return self._apply('values', *fields)
+
+    def order_by(self, *ordering):
+        return MergedQuerySet(self.querysets, ordering)
+
+    def count(self):
+        return sum(qs.count() for qs in self.querysets)
+
+    async def acount(self):
+        return sum([await qs.acount() for qs in self.querysets])
+
+    def __len__(self):
+        return self.count()
+
+    def merged(self, limit=None):
+        querysets = [qs.order_by(*self.ordering) for qs in self.querysets]
+        if len(querysets) == 1:
+            return querysets[0]
+        if limit == 0:
+            # Django can't reorder a UNION of zero-row slices; an empty
+            # first page (user without transactions) has nothing to fetch.
+            return querysets[0].none()
+        if limit is not None:
+            querysets = [qs[:limit] for qs in querysets]
+        first, *rest = querysets
+        return first.union(*rest, all=True).order_by(*self.ordering)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self.merged(limit=key + 1)[key]
+        if key.stop is None or key.step is not None:
+            return self.merged()[key]
+        return self.merged(limit=key.stop)[key]
+
+    def __iter__(self):
+        return iter(self.merged())
+
+    def iterator(self, chunk_size=None):
+        return self.merged().iterator(chunk_size=chunk_size)
+
+
+class TransactionQuerySet(models.QuerySet):
+    def history(self, user, transaction_type=None):
+        """
+        Transfers `user` took part in, newest first, annotated with the
+        user's side of each one: `transaction_type` and `leg_amount`.
+
+        Sent and received transfers are separate branches so that each one
+        is a range scan on its (party, created_at, id) index.
+        """
+        sent = self.filter(sender=user).annotate(
+            transaction_type=Value('SENT'), leg_amount=F('amount')
+        )
+        received = self.filter(receiver=user).annotate(
+            transaction_type=Value('RECEIVED'), leg_amount=F('converted_amount')
+        )
+        if transaction_type == 'SENT':
+            return MergedQuerySet([sent])
+        if transaction_type == 'RECEIVED':
+            return MergedQuerySet([received])
+        # Transfers to oneself are listed once, as sent.
+        return MergedQuerySet([sent, received.exclude(sender=user)])
+
+
+class WalletQuerySet(models.QuerySet):
+    def balances_query(self, user_id):
+        # One LEFT JOIN row per balance, or a single row of NULLs if there is none.
+        return self.filter(user_id=user_id).order_by('balances__currency').values_list(
+            'balances__currency', 'balances__amount'
+        )
+
+    def balances_of(self, user_id):
+        """{currency: minor units} held by the wallet of `user_id`, in one query."""
+        return self._balances(list(self.balances_query(user_id)))
+
+    async def abalances_of(self, user_id):
+        return self._balances([row async for row in self.balances_query(user_id)])
+
+    def _balances(self, rows):
+        if not rows:
+            raise self.model.DoesNotExist("Wallet not found.")
+        return {currency: amount for currency, amount in rows if currency is not None}
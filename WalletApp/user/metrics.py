@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Anything else is recorded as OTHER, so clients can't add label values.
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+REGISTRY = []
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter(object):
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self, extra=()):
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{format_labels(self.labels, key, extra)} {value}" for key, value in sorted(values.items())
+        ]
+
+
+class CallbackMetric(object):
+    """A metric read from `callback`, {label values: value}, at scrape time."""
+
+    def __init__(self, name, type, documentation, labels, callback):
+        self.name = name
+        self.type = type
+        self.documentation = documentation
+        self.labels = labels
+        self.callback = callback
+        REGISTRY.append(self)
+
+    def samples(self, extra=()):
+        return [
+            f"{self.name}{format_labels(self.labels, key, extra)} {value}"
+            for key, value in sorted(self.callback().items())
+        ]
+
+
+class Histogram(object):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (made cumulative when rendered), sum.
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self, extra=()):
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        lines = []
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{format_labels(self.labels, key, [*extra, ('le', bound)])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key, extra)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key, extra)} {cumulative}")
+        return lines
+
+
+def render():
+    """
+    Every registered metric in the Prometheus text exposition format. The
+    values are this process's own; each sample is labelled with its pid,
+    so the series of different worker processes don't mix.
+    """
+    worker = [('worker', os.getpid())]
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples(worker))
+    return '\n'.join(lines) + '\n'
+
+
+request_duration = Histogram(
+    'wallet_http_request_duration_seconds', "Time spent handling a request.", ('endpoint', 'method'),
+)
+request_count = Counter('wallet_http_requests_total', "Requests handled.", ('endpoint', 'method', 'status'))
+request_queries = Histogram(
+    'wallet_db_queries_per_request', "Database queries run by a request.", ('endpoint',), QUERY_COUNT_BUCKETS,
+)
+request_db_time = Histogram(
+    'wallet_db_time_per_request_seconds', "Time a request spent in database queries.", ('endpoint',),
+    DB_TIME_BUCKETS,
+)
+exchange_fetch_duration = Histogram(
+    'wallet_exchange_fetch_duration_seconds', "Exchange-rate provider calls.", ('outcome',),
+)
+exchange_failures = Counter(
+    'wallet_exchange_fetch_failures_total', "Exchange rates that could not be fetched.", ('reason',),
+)
+transfers = Counter('wallet_transfers_total', "Transfer transactions by outcome.", ('kind', 'outcome'))
+throttled = Counter('wallet_throttled_requests_total', "Requests refused by a throttle.", ('scope', 'kind'))
+shed = Counter('wallet_shed_requests_total', "Requests turned away by a concurrency limit.", ('limit',))
+outbox_events = Counter(
+    'wallet_outbox_events_total', "Outbox events by outcome: handled, retried or failed.", ('topic', 'outcome'),
+)
+
+# [query count, seconds in queries] of the request being handled.
+_request_queries = ContextVar('request_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    stats = _request_queries.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """connection_created receiver; a reconnecting connection keeps its wrappers."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware(object):
+    """
+    Records the latency and database use of each request, by URL name.
+    Metrics live in the process that served the request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    def start(self):
+        stats = [0, 0.0]
+        return stats, _request_queries.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else 'unmatched'
+        method = request.method if request.method in METHODS else 'OTHER'
+        request_duration.observe(elapsed, endpoint, method)
+        request_count.inc(endpoint, method, response.status_code)
+        request_queries.observe(stats[0], endpoint)
+        request_db_time.observe(stats[1], endpoint)
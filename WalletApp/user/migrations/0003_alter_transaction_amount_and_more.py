@@ -1,33 +1,33 @@
-# Generated by Django 5.2.3 on 2025-06-21 19:16
-
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('user', '0002_transaction_wallet'),
-    ]
-
-    operations = [
-        migrations.AlterField(
-            model_name='transaction',
-            name='amount',
-            field=models.FloatField(),
-        ),
-        migrations.AlterField(
-            model_name='transaction',
-            name='exchange_rate',
-            field=models.FloatField(null=True),
-        ),
-        migrations.AlterField(
-            model_name='wallet',
-            name='balance',
-            field=models.FloatField(default=0.0),
-        ),
-        migrations.AlterField(
-            model_name='wallet',
-            name='usd_balance',
-            field=models.FloatField(default=0.0),
-        ),
-    ]
+# Generated by Django 5.2.3 on 2025-06-21 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_transaction_wallet'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='exchange_rate',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='balance',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='usd_balance',
+            field=models.FloatField(default=0.0),
+        ),
+    ]
@@ -0,0 +1,144 @@
+import math
+from datetime import timedelta
+from django.db import migrations, transaction
+
+# Both legs of a transfer carry the same values in these fields.
+LEG_MATCH = ('sender_id', 'receiver_id', 'from_currency', 'to_currency', 'exchange_rate', 'ip_address')
+# The RECEIVED leg was written right after the SENT one, in the same request.
+LEG_GAP = timedelta(seconds=5)
+BATCH_SIZE = 2000
+
+
+def is_pair(sent, received):
+    """`received` holds the amount of `sent` at its rate, rounded down to the cent."""
+    expected = sent['amount'] * (sent['exchange_rate'] or 1.0)
+    return (
+        expected - 0.01 - 1e-6 <= received['amount'] <= expected + 1e-6
+        and sent['created_at'] <= received['created_at'] <= sent['created_at'] + LEG_GAP
+    )
+
+
+def lone_sent(Transaction, sent):
+    """A SENT leg without its RECEIVED leg, receiving its amount at its rate."""
+    received = math.floor(sent['amount'] * (sent['exchange_rate'] or 1.0) * 100 + 1e-6) / 100
+    return Transaction(pk=sent['pk'], amount=sent['amount'], converted_amount=received)
+
+
+def lone_received(Transaction, received):
+    """A RECEIVED leg without its SENT leg, having sent its amount at its rate."""
+    sent = round(received['amount'] / (received['exchange_rate'] or 1.0), 2)
+    return Transaction(pk=received['pk'], amount=sent, converted_amount=received['amount'])
+
+
+def save(Transaction, rows, folded):
+    with transaction.atomic():
+        Transaction.objects.bulk_update(rows, ['amount', 'converted_amount'], batch_size=BATCH_SIZE)
+        Transaction.objects.filter(pk__in=folded).delete()
+
+
+def report(kind, ids):
+    if ids:
+        shown = ', '.join(map(str, sorted(ids)[:20])) + (', ...' if len(ids) > 20 else '')
+        print(f"\n  Kept {len(ids)} {kind} as transfers of their own (ids {shown}).", end='')
+
+
+def fold_transaction_pairs(apps, schema_editor):
+    """
+    Transfers used to be logged as a SENT row and then its RECEIVED row.
+    Concurrent transfers interleave their ids, so each RECEIVED row is
+    paired with the earliest unmatched SENT row before it whose fields and
+    amount match. The received amount is copied onto the SENT row and the
+    RECEIVED row is dropped.
+
+    Rows are read in batches by id and each batch is folded in its own
+    transaction, so an interrupted run resumes where it stopped. A leg
+    without a pair becomes a transfer of its own, the other amount worked
+    out from its rate, and is reported.
+    """
+    Transaction = apps.get_model('user', 'Transaction')
+    # Rows folded by an earlier run already have a converted amount.
+    rows = (
+        Transaction.objects.filter(converted_amount__isnull=True).order_by('pk')
+        .values('pk', 'transaction_type', 'amount', 'created_at', *LEG_MATCH)
+    )
+    unmatched = {}
+    unpaired_sent, unpaired_received = [], []
+    last_pk, latest = 0, None
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1]['pk']
+        updated, folded = [], []
+        for row in batch:
+            latest = row['created_at'] if latest is None else max(latest, row['created_at'])
+            candidates = unmatched.setdefault(tuple(row[field] for field in LEG_MATCH), [])
+            if row['transaction_type'] == 'SENT':
+                candidates.append(row)
+                continue
+            for index, sent in enumerate(candidates):
+                if is_pair(sent, row):
+                    del candidates[index]
+                    updated.append(Transaction(pk=sent['pk'], amount=sent['amount'], converted_amount=row['amount']))
+                    folded.append(row['pk'])
+                    break
+            else:
+                updated.append(lone_received(Transaction, row))
+                unpaired_received.append(row['pk'])
+        # Ids follow creation times closely, so SENT rows this far behind
+        # the newest row won't be matched any more.
+        for key, candidates in list(unmatched.items()):
+            while candidates and candidates[0]['created_at'] < latest - 2 * LEG_GAP:
+                sent = candidates.pop(0)
+                updated.append(lone_sent(Transaction, sent))
+                unpaired_sent.append(sent['pk'])
+            if not candidates:
+                del unmatched[key]
+        save(Transaction, updated, folded)
+
+    remaining = [sent for candidates in unmatched.values() for sent in candidates]
+    save(Transaction, [lone_sent(Transaction, sent) for sent in remaining], [])
+    unpaired_sent.extend(sent['pk'] for sent in remaining)
+    report("SENT rows without a RECEIVED leg", unpaired_sent)
+    report("RECEIVED rows without a SENT leg", unpaired_received)
+
+
+@transaction.atomic
+def split_transaction_pairs(apps, schema_editor):
+    Transaction = apps.get_model('user', 'Transaction')
+    last = Transaction.objects.order_by('-pk').values_list('pk', flat=True).first()
+    if last is None:
+        return
+    pairs = []
+    for row in Transaction.objects.filter(pk__lte=last).order_by('pk').iterator(chunk_size=2000):
+        for transaction_type, amount in (('SENT', row.amount), ('RECEIVED', row.converted_amount)):
+            pairs.append(Transaction(
+                sender_id=row.sender_id,
+                receiver_id=row.receiver_id,
+                amount=amount,
+                converted_amount=row.converted_amount,
+                from_currency=row.from_currency,
+                to_currency=row.to_currency,
+                exchange_rate=row.exchange_rate,
+                transaction_type=transaction_type,
+                ip_address=row.ip_address,
+                created_at=row.created_at,
+            ))
+        if len(pairs) >= 2000:
+            Transaction.objects.bulk_create(pairs)
+            pairs = []
+    Transaction.objects.bulk_create(pairs)
+    Transaction.objects.filter(pk__lte=last).delete()
+
+
+class Migration(migrations.Migration):
+    # Each batch of the fold commits on its own.
+    atomic = False
+
+    dependencies = [
+        ('user', '0004_transaction_converted_amount'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_transaction_pairs, split_transaction_pairs),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0005_fold_transaction_pairs'),
+    ]
+
+    operations = [
+        # The default only matters when unapplying: it backfills the
+        # re-added column before the pairs are split again.
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('SENT', 'Sent'), ('RECEIVED', 'Received')], default='SENT', max_length=10),
+        ),
+        migrations.RemoveField(
+            model_name='transaction',
+            name='transaction_type',
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='converted_amount',
+            field=models.FloatField(),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Build the indexes without blocking writes to the transaction table.
+    atomic = False
+
+    dependencies = [
+        ('user', '0006_remove_transaction_transaction_type'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['sender', '-created_at', '-id'], name='txn_sender_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transaction',
+            index=models.Index(fields=['receiver', '-created_at', '-id'], name='txn_receiver_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='receiver',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='received_transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='sender',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sent_transactions', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import Round
+
+MONEY_FIELDS = {
+    'Wallet': ('balance', 'usd_balance'),
+    'Transaction': ('amount', 'converted_amount'),
+}
+
+
+def rewrite(apps, expression):
+    for model_name, fields in MONEY_FIELDS.items():
+        model = apps.get_model('user', model_name)
+        model.objects.update(**{field: expression(field) for field in fields})
+
+
+def to_minor_units(apps, schema_editor):
+    """
+    Scale the float columns to whole minor units while they are still
+    floats; 0010 then changes their type. Rounding to the nearest minor
+    unit recovers the two-decimal value each float approximated.
+    """
+    rewrite(apps, lambda field: Round(F(field) * 100))
+
+
+def to_major_units(apps, schema_editor):
+    rewrite(apps, lambda field: F(field) / 100.0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0008_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_minor_units, to_major_units),
+    ]
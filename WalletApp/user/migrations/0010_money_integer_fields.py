@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0009_money_minor_units'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='amount',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='converted_amount',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='exchange_rate',
+            field=models.DecimalField(decimal_places=10, max_digits=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='balance',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='wallet',
+            name='usd_balance',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0010_money_integer_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('amount', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('wallet', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='user.wallet')),
+            ],
+            options={
+                'verbose_name': 'Wallet balance',
+                'verbose_name_plural': 'Wallet balances',
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'currency'), name='wallet_balance_currency_unique')],
+            },
+        ),
+    ]
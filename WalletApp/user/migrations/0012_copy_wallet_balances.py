@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+COLUMNS = {'balance': 'INR', 'usd_balance': 'USD'}
+
+
+def copy_to_balance_rows(apps, schema_editor):
+    """One WalletBalance row per non-zero INR and USD column of each wallet."""
+    Wallet = apps.get_model('user', 'Wallet')
+    WalletBalance = apps.get_model('user', 'WalletBalance')
+    for field, currency in COLUMNS.items():
+        rows = Wallet.objects.exclude(**{field: 0}).values_list('pk', field)
+        batch = []
+        for wallet_id, amount in rows.iterator(chunk_size=2000):
+            batch.append(WalletBalance(wallet_id=wallet_id, currency=currency, amount=amount))
+            if len(batch) >= 2000:
+                WalletBalance.objects.bulk_create(batch)
+                batch = []
+        WalletBalance.objects.bulk_create(batch)
+
+
+def copy_to_columns(apps, schema_editor):
+    Wallet = apps.get_model('user', 'Wallet')
+    WalletBalance = apps.get_model('user', 'WalletBalance')
+    Wallet.objects.update(**{
+        field: Coalesce(
+            Subquery(WalletBalance.objects.filter(wallet=OuterRef('pk'), currency=currency).values('amount')[:1]),
+            Value(0),
+        )
+        for field, currency in COLUMNS.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0011_walletbalance'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_to_balance_rows, copy_to_columns),
+    ]
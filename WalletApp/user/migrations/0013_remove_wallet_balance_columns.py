@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0012_copy_wallet_balances'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='wallet',
+            name='balance',
+        ),
+        migrations.RemoveField(
+            model_name='wallet',
+            name='usd_balance',
+        ),
+    ]
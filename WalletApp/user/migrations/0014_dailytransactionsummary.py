@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0013_remove_wallet_balance_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransactionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('currency', models.CharField(max_length=3)),
+                ('transaction_type', models.CharField(choices=[('SENT', 'Sent'), ('RECEIVED', 'Received')], max_length=8)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('amount', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Daily transaction summary',
+                'verbose_name_plural': 'Daily transaction summaries',
+                'constraints': [models.UniqueConstraint(fields=('user', 'day', 'currency', 'transaction_type'), name='daily_summary_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,124 @@
+from datetime import date, datetime, time, timezone
+from django.conf import settings
+from django.db import migrations
+
+TABLE = 'user_transaction'
+LEGACY = 'user_transaction_unpartitioned'
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def bound(month):
+    return datetime.combine(month, time.min, tzinfo=timezone.utc)
+
+
+def move_definitions(cursor, source, target):
+    """
+    Drop the secondary indexes and foreign keys of `source` and return
+    statements that recreate them, under the same names, on `target`.
+    """
+    cursor.execute(
+        """
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = %s
+          AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))
+        """,
+        [source, source],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [source],
+    )
+    foreign_keys = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    for name, _ in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{source}" DROP CONSTRAINT "{name}"')
+    return (
+        [definition.replace(f' ON {source} ', f' ON {target} ').replace(f'.{source} ', f'.{target} ')
+         for _, definition in indexes]
+        + [f'ALTER TABLE "{target}" ADD CONSTRAINT "{name}" {definition}' for name, definition in foreign_keys]
+    )
+
+
+def partition(apps, schema_editor):
+    """
+    Rebuild the transaction table as one partitioned by month of
+    created_at: monthly partitions from the oldest row to
+    TRANSACTION_PARTITION_MONTHS_AHEAD months from now, plus a default
+    partition for anything outside them. The primary key becomes
+    (id, created_at), as PostgreSQL requires the partition key in it; ids
+    keep coming from one sequence. Other databases keep the plain table.
+
+    This needs downtime: every row is copied and the indexes rebuilt in
+    the migration's transaction, under an exclusive lock on the table, so
+    transfers and history reads wait until it commits. Unapplying it
+    copies the table back the same way.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"')
+        cursor.execute(f'ALTER TABLE "{LEGACY}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{LEGACY}_pkey"')
+        recreate = move_definitions(cursor, LEGACY, TABLE)
+
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY}" INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, created_at)')
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+        cursor.execute(f'SELECT min(created_at), max(id) FROM "{LEGACY}"')
+        oldest, last_id = cursor.fetchone()
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        month = min(oldest.astimezone(timezone.utc).date().replace(day=1), this_month) if oldest else this_month
+        while month <= add_months(this_month, settings.TRANSACTION_PARTITION_MONTHS_AHEAD):
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month:%Y_%m}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [bound(month), bound(add_months(month, 1))],
+            )
+            month = add_months(month, 1)
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY}"')
+        for statement in recreate:
+            cursor.execute(statement)
+        cursor.execute(f'DROP TABLE "{LEGACY}"')
+
+        cursor.execute(f'CREATE SEQUENCE "{TABLE}_id_seq" OWNED BY "{TABLE}".id')
+        cursor.execute(f"SELECT setval('\"{TABLE}_id_seq\"', %s, false)", [(last_id or 0) + 1])
+        cursor.execute(f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{TABLE}_id_seq"\')')
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY}"')
+        cursor.execute(f'ALTER TABLE "{LEGACY}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{LEGACY}_pkey"')
+        recreate = move_definitions(cursor, LEGACY, TABLE)
+
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY}" INCLUDING CONSTRAINTS)')
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY}"')
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id)')
+        for statement in recreate:
+            cursor.execute(statement)
+        cursor.execute(f'DROP TABLE "{LEGACY}" CASCADE')
+
+        cursor.execute(f'SELECT max(id) FROM "{TABLE}"')
+        last_id = cursor.fetchone()[0]
+        cursor.execute(
+            f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH %s)',
+            [(last_id or 0) + 1],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0014_dailytransactionsummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
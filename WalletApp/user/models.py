@@ -1,66 +1,178 @@
-import uuid
-from django.db import models
-from django.contrib.auth.base_user import AbstractBaseUser
-from django.contrib.auth.models import PermissionsMixin
-from .managers import CustomUserManager
-from django.utils import timezone
-# Create your models here.
-class User(AbstractBaseUser, PermissionsMixin):
-    uid = models.UUIDField(unique=True, default=uuid.uuid4, editable=False, verbose_name='Public identifier')
-    name = models.CharField(max_length=30, blank=True)
-    email = models.EmailField(unique=True, blank=True, null=True)
-    password = models.CharField(max_length=500)
-    is_staff = models.BooleanField(default=False)
-    is_active = models.BooleanField(default=True)
-    is_delete = models.BooleanField(default=False)
-    email_verified = models.BooleanField(default=False)
-    created_on = models.DateTimeField(auto_now_add=True)
-    update_on = models.DateTimeField(auto_now=True, blank=True, null=True)
-
-    USERNAME_FIELD = 'email'
-    REQUIRED_FIELDS = []
-    objects = CustomUserManager()
-
-    class Meta:
-        verbose_name = 'user'
-        verbose_name_plural = 'user'
-
-    def __str__(self):
-        return self.email or ''
-
-class Wallet(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE)
-    balance = models.FloatField(default=0.00)
-    usd_balance = models.FloatField(default=0.00)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-
-    class Meta:
-        verbose_name = 'Wallet'
-        verbose_name_plural = 'Wallet'
-
-    def __str__(self):
-        return f"{self.user.name}'s Wallet"
-
-class Transaction(models.Model):
-    TRANSACTION_TYPES = (
-        ('SENT', 'Sent'),
-        ('RECEIVED', 'Received'),
-    )
-    
-    sender = models.ForeignKey(User, related_name='sent_transactions', on_delete=models.CASCADE)
-    receiver = models.ForeignKey(User, related_name='received_transactions', on_delete=models.CASCADE)
-    amount = models.FloatField()
-    from_currency = models.CharField(max_length=3, default='INR')
-    to_currency = models.CharField(max_length=3, default='INR')
-    exchange_rate = models.FloatField(null=True)
-    transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
-    ip_address = models.GenericIPAddressField()
-    created_at = models.DateTimeField(default=timezone.now)
-
-    class Meta:
-        verbose_name = 'Transaction'
-        verbose_name_plural = 'Transaction'
-
-    def __str__(self):
-        return f"{self.sender.name} to {self.receiver.name}: {self.amount} {self.from_currency}"
\ No newline at end of file
+import uuid
+from django.db import models
+from django.contrib.auth.base_user import AbstractBaseUser
+from django.contrib.auth.models import PermissionsMixin
+from .managers import CustomUserManager, TransactionQuerySet, WalletQuerySet
+from django.utils import timezone
+# Create your models here.
+class User(AbstractBaseUser, PermissionsMixin):
+    uid = models.UUIDField(unique=True, default=uuid.uuid4, editable=False, verbose_name='Public identifier')
+    name = models.CharField(max_length=30, blank=True)
+    email = models.EmailField(unique=True, blank=True, null=True)
+    password = models.CharField(max_length=500)
+    is_staff = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
+    is_delete = models.BooleanField(default=False)
+    email_verified = models.BooleanField(default=False)
+    created_on = models.DateTimeField(auto_now_add=True)
+    update_on = models.DateTimeField(auto_now=True, blank=True, null=True)
+
+    USERNAME_FIELD = 'email'
+    REQUIRED_FIELDS = []
+    objects = CustomUserManager()
+
+    class Meta:
+        verbose_name = 'user'
+        verbose_name_plural = 'user'
+
+    def __str__(self):
+        return self.email or ''
+
+class Wallet(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = WalletQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Wallet'
+        verbose_name_plural = 'Wallet'
+
+    def __str__(self):
+        return f"{self.user.name}'s Wallet"
+
+class WalletBalance(models.Model):
+    """
+    A wallet's balance in one currency, in minor units (see user/money.py).
+    Rows are created on first credit; a missing row is a zero balance.
+    """
+    # Covered by the unique (wallet, currency) index below.
+    wallet = models.ForeignKey(Wallet, related_name='balances', on_delete=models.CASCADE, db_index=False)
+    currency = models.CharField(max_length=3)
+    amount = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Wallet balance'
+        verbose_name_plural = 'Wallet balances'
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'currency'], name='wallet_balance_currency_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.wallet_id}: {self.amount} {self.currency}"
+
+class Transaction(models.Model):
+    """
+    One row per transfer. `amount` is what the sender paid in `from_currency`
+    and `converted_amount` is what the receiver got in `to_currency`, both in
+    minor units; the SENT/RECEIVED view of a row is derived per user at
+    read time.
+    """
+    TRANSACTION_TYPES = (
+        ('SENT', 'Sent'),
+        ('RECEIVED', 'Received'),
+    )
+    
+    # Covered by the composite history indexes below.
+    sender = models.ForeignKey(User, related_name='sent_transactions', on_delete=models.CASCADE, db_index=False)
+    receiver = models.ForeignKey(User, related_name='received_transactions', on_delete=models.CASCADE, db_index=False)
+    amount = models.BigIntegerField()
+    converted_amount = models.BigIntegerField()
+    from_currency = models.CharField(max_length=3, default='INR')
+    to_currency = models.CharField(max_length=3, default='INR')
+    exchange_rate = models.DecimalField(max_digits=20, decimal_places=10, null=True)
+    ip_address = models.GenericIPAddressField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = TransactionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Transaction'
+        verbose_name_plural = 'Transaction'
+        indexes = [
+            models.Index(fields=['sender', '-created_at', '-id'], name='txn_sender_created_idx'),
+            models.Index(fields=['receiver', '-created_at', '-id'], name='txn_receiver_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sender.name} to {self.receiver.name}: {self.amount} {self.from_currency}"
+
+class IdempotencyKey(models.Model):
+    """
+    The stored outcome of a request sent with an `Idempotency-Key` header.
+    `response` stays empty while the first request is being processed.
+    """
+    # Covered by the unique constraint below.
+    user = models.ForeignKey(User, related_name='idempotency_keys', on_delete=models.CASCADE, db_index=False)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    # Rendered JSON, kept as text so a replay has the original key order.
+    response = models.TextField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = 'Idempotency key'
+        verbose_name_plural = 'Idempotency keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+
+class DailyTransactionSummary(models.Model):
+    """
+    Per user, day, currency and side: how many transfers and their total in
+    minor units. Transfers queue their ledger rows in the outbox and the
+    outbox worker adds them; see user/summaries.py.
+    """
+    # Covered by the unique constraint below.
+    user = models.ForeignKey(User, related_name='daily_summaries', on_delete=models.CASCADE, db_index=False)
+    day = models.DateField()
+    currency = models.CharField(max_length=3)
+    transaction_type = models.CharField(max_length=8, choices=Transaction.TRANSACTION_TYPES)
+    count = models.PositiveIntegerField(default=0)
+    amount = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Daily transaction summary'
+        verbose_name_plural = 'Daily transaction summaries'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'day', 'currency', 'transaction_type'], name='daily_summary_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.day}: {self.transaction_type} {self.count} / {self.amount} {self.currency}"
+
+class OutboxEvent(models.Model):
+    """
+    Work a transfer leaves for later, written in the transfer's own
+    database transaction and carried out by `manage.py process_outbox`;
+    see user/outbox.py. Handled events are deleted; events that keep
+    failing get `failed_at` and stay for inspection.
+    """
+    topic = models.CharField(max_length=64)
+    payload = models.JSONField()
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Outbox event'
+        verbose_name_plural = 'Outbox events'
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'], condition=models.Q(failed_at__isnull=True), name='outbox_pending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk}"
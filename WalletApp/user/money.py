@@ -0,0 +1,24 @@
+from decimal import Decimal, ROUND_DOWN
+
+# Balances and amounts are stored as integers in minor units (paise,
+# cents); the API and exports use major units with two decimal places.
+DECIMAL_PLACES = 2
+
+
+def to_minor(amount):
+    """Decimal major units to integer minor units; refuses to round."""
+    minor = Decimal(amount).scaleb(DECIMAL_PLACES)
+    if not minor.is_finite():
+        raise ValueError(f"{amount} is not a valid amount.")
+    if minor != minor.to_integral_value():
+        raise ValueError(f"{amount} has more than {DECIMAL_PLACES} decimal places.")
+    return int(minor)
+
+
+def to_major(minor):
+    return Decimal(minor).scaleb(-DECIMAL_PLACES)
+
+
+def convert(amount, exchange_rate):
+    """`amount` minor units at `exchange_rate`, rounded down to a whole minor unit."""
+    return int((amount * exchange_rate).to_integral_value(rounding=ROUND_DOWN))
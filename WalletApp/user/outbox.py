@@ -0,0 +1,99 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from . import metrics
+from .models import OutboxEvent
+
+# topic: function(payloads), called with the payloads of one batch.
+HANDLERS = {}
+
+
+def handler(topic):
+    def register(func):
+        HANDLERS[topic] = func
+        return func
+    return register
+
+
+def publish(topic, payload):
+    """Queue an event; call it inside the transaction whose effects it describes."""
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def pending():
+    return OutboxEvent.objects.filter(failed_at__isnull=True, available_at__lte=timezone.now())
+
+
+def backoff(attempts):
+    """Seconds before retry number `attempts`: doubling from OUTBOX_RETRY_BACKOFF, capped."""
+    return min(settings.OUTBOX_RETRY_BACKOFF * 2 ** (attempts - 1), settings.OUTBOX_RETRY_BACKOFF_MAX)
+
+
+def run(topic, events):
+    """
+    Run the handler of `topic` over `events` in a savepoint. Returns the
+    events that failed, with their error. A failing batch is retried one
+    event at a time so one bad event doesn't hold back the others.
+    """
+    func = HANDLERS.get(topic)
+    if func is None:
+        return [(event, f"No handler for topic {topic}.") for event in events]
+    try:
+        with transaction.atomic():
+            func([event.payload for event in events])
+            # Deferred foreign keys would otherwise fail the whole batch at commit.
+            connection.check_constraints()
+        return []
+    except Exception as e:
+        if len(events) == 1:
+            return [(events[0], f"{type(e).__name__}: {e}")]
+    failed = []
+    for event in events:
+        failed.extend(run(topic, [event]))
+    return failed
+
+
+def process_batch(batch_size=None):
+    """
+    Claim up to `batch_size` due events, skipping those other workers hold,
+    and handle them in the claiming transaction: handled events are
+    deleted with the effects of their handler, failed ones are retried
+    later with backoff. Returns (handled, failed) counts.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    with transaction.atomic():
+        events = list(pending().select_for_update(skip_locked=True).order_by('available_at', 'id')[:batch_size])
+        topics = {}
+        for event in events:
+            topics.setdefault(event.topic, []).append(event)
+
+        failed = {}
+        for topic, group in topics.items():
+            for event, error in run(topic, group):
+                failed[event.pk] = (event, error)
+
+        now = timezone.now()
+        for event, error in failed.values():
+            event.attempts += 1
+            event.last_error = error
+            if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                event.failed_at = now
+            else:
+                event.available_at = now + timedelta(seconds=backoff(event.attempts))
+        OutboxEvent.objects.bulk_update(
+            [event for event, _ in failed.values()], ['attempts', 'last_error', 'available_at', 'failed_at']
+        )
+        handled = [event for event in events if event.pk not in failed]
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in handled]).delete()
+
+    for event in handled:
+        metrics.outbox_events.inc(event.topic, 'handled')
+    for event, _ in failed.values():
+        metrics.outbox_events.inc(event.topic, 'failed' if event.failed_at else 'retried')
+    return len(handled), len(failed)
+
+
+def retry(events):
+    """Queue failed `events` (a queryset) again from the first attempt."""
+    return events.update(failed_at=None, attempts=0, last_error='', available_at=timezone.now())
@@ -1,23 +1,139 @@
-from rest_framework import pagination
-from rest_framework.response import Response
-from .response_handler import ResponseHandler
-
-
-class TransactionListPagination(pagination.PageNumberPagination):
-    response_handler = ResponseHandler()
-    page_size = 10  # Default page size
-    page_size_query_param = "page_size"
-    max_page_size = 5000
-
-    def get_paginated_response(self, data):
-        context = {
-            "count": self.page.paginator.count,
-            "next": self.get_next_link(),
-            "previous": self.get_previous_link(),
-            "results": data,
-        }
-        response_dict, status_code = self.response_handler.success(
-            data=context,
-            msg="Transaction data fetched successfully!",
-        )
-        return Response(response_dict)
\ No newline at end of file
+import base64
+import json
+from datetime import datetime
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .response_handler import ResponseHandler
+
+
+class TransactionListPagination(pagination.PageNumberPagination):
+    response_handler = ResponseHandler()
+    page_size = 10  # Default page size
+    page_size_query_param = "page_size"
+    max_page_size = 5000
+
+    def get_paginated_response(self, data):
+        context = {
+            "count": self.page.paginator.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        response_dict, status_code = self.response_handler.success(
+            data=context,
+            msg="Transaction data fetched successfully!",
+        )
+        return Response(response_dict)
+
+
+class TransactionCursorPagination(pagination.BasePagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+
+    Each page is a range scan starting at the cursor position, so deep
+    pages cost the same as the first one. The total count is only computed
+    when `with_count=true` is passed.
+    """
+    response_handler = ResponseHandler()
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 5000
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request)
+        if self.with_count:
+            self.count = queryset.count()
+        return self.set_page(list(page[:self.page_size + 1]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request)
+        if self.with_count:
+            self.count = await queryset.acount()
+        return self.set_page([row async for row in page[:self.page_size + 1]])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        self.with_count = request.query_params.get(self.count_query_param) == "true"
+
+        token = request.query_params.get(self.cursor_query_param)
+        self.position, self.reverse = self.decode_cursor(token) if token else (None, False)
+        if self.position is None:
+            return queryset.order_by("-created_at", "-id")
+        created_at, pk = self.position
+        if self.reverse:
+            return queryset.filter(
+                Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=pk))
+            ).order_by("created_at", "id")
+        return queryset.filter(
+            Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=pk))
+        ).order_by("-created_at", "-id")
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+        self.rows = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, row, reverse):
+        payload = json.dumps({"t": row.created_at.isoformat(), "i": row.pk, "r": int(reverse)})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, token):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            position = (datetime.fromisoformat(payload["t"]), int(payload["i"]))
+            return position, bool(payload["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_link(self, token):
+        url = self.request.build_absolute_uri()
+        if token is None:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.get_link(self.encode_cursor(self.rows[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.rows:
+            return None
+        return self.get_link(self.encode_cursor(self.rows[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        context = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            context["count"] = self.count
+        response_dict, status_code = self.response_handler.success(
+            data=context,
+            msg="Transaction data fetched successfully!",
+        )
+        return Response(response_dict)
@@ -0,0 +1,148 @@
+from datetime import date, datetime, time, timezone as dt_timezone
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Transaction
+
+ARCHIVE_MODES = ('detach', 'archive')
+
+
+def table():
+    return Transaction._meta.db_table
+
+
+def archive_table():
+    return f"{table()}_archive"
+
+
+def default_partition():
+    return f"{table()}_default"
+
+
+def partition_name(month):
+    return f"{table()}_p{month:%Y_%m}"
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def bound(month):
+    """Partitions are bounded by calendar months in UTC, whatever TIME_ZONE is."""
+    return datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table()]
+        )
+        return cursor.fetchone() is not None
+
+
+def partitions():
+    """{month: partition name} of the monthly partitions currently attached."""
+    prefix = f"{table()}_p"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            """,
+            [table()],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return {
+        datetime.strptime(name[len(prefix):], '%Y_%m').date(): name
+        for name in names if name.startswith(prefix)
+    }
+
+
+def create_partition(month):
+    """
+    Attach the partition of `month` unless it exists; returns whether it
+    was created. Rows that landed in the default partition because it was
+    missing are moved into it. Concurrent calls take turns, so overlapping
+    runs don't both try to create the same table.
+    """
+    quote = connection.ops.quote_name
+    parent, name, default = quote(table()), quote(partition_name(month)), quote(default_partition())
+    lower, upper = bound(month), bound(add_months(month, 1))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"{table()}:partitions"])
+        cursor.execute("SELECT to_regclass(%s)", [partition_name(month)])
+        if cursor.fetchone()[0] is not None:
+            return False
+        cursor.execute(
+            f"SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s LIMIT 1", [lower, upper]
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(
+                f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES FROM (%s) TO (%s)", [lower, upper]
+            )
+            return True
+        cursor.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            [lower, upper],
+        )
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", [lower, upper])
+    return True
+
+
+def ensure_partitions(months_ahead, start=None):
+    """
+    Create the missing monthly partitions from `start` (default: this
+    month) to `months_ahead` months from now. Returns the months created.
+    """
+    existing = partitions()
+    this_month = month_start(timezone.now().date())
+    month = month_start(start or this_month)
+    last = add_months(this_month, months_ahead)
+    created = []
+    while month <= last:
+        if month not in existing and create_partition(month):
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+
+def archive(before, mode='detach'):
+    """
+    Take the monthly partitions that end on or before `before` out of the
+    transaction table. `detach` leaves each one as a table of its own;
+    `archive` appends its rows to the unindexed archive table and drops
+    it. Returns the names of the partitions removed.
+    """
+    quote = connection.ops.quote_name
+    parent, archived = quote(table()), quote(archive_table())
+    removed = []
+    for month, name in sorted(partitions().items()):
+        if add_months(month, 1) > before:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {parent} DETACH PARTITION {quote(name)}")
+            # Archived rows must not stop their users from being deleted.
+            cursor.execute(
+                "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'", [name]
+            )
+            for (constraint,) in cursor.fetchall():
+                cursor.execute(f"ALTER TABLE {quote(name)} DROP CONSTRAINT {quote(constraint)}")
+            if mode == 'archive':
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {archived} (LIKE {parent})")
+                cursor.execute(f"INSERT INTO {archived} SELECT * FROM {quote(name)}")
+                cursor.execute(f"DROP TABLE {quote(name)}")
+        removed.append(name)
+    return removed
@@ -0,0 +1,174 @@
+import csv
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from .models import User, Wallet
+from .serializers import PASSWORD_PATTERN, PASSWORD_RULES
+from . import routers
+
+FORMATS = ('csv', 'jsonl')
+
+
+def detect_format(filename):
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    return 'jsonl' if extension in ('jsonl', 'ndjson') else 'csv'
+
+
+def read_records(lines, input_format):
+    """
+    Yield (line_number, record) pairs from CSV (with a header row) or JSON
+    Lines. Records have `email` and optionally `name`, `password` and
+    `password_hash`.
+    """
+    if input_format == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if line.strip():
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, {'_error': f"Invalid JSON: {e}"}
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+class Report(object):
+    def __init__(self):
+        self.created = 0
+        self.duplicates = []
+        self.invalid = []
+
+    def as_dict(self):
+        return {'created': self.created, 'duplicates': self.duplicates, 'invalid': self.invalid}
+
+
+def balance_columns():
+    return ['balance', *(f'{currency.lower()}_balance' for currency in settings.WALLET_CURRENCIES)]
+
+
+def prepare(line_number, record, seen, report):
+    """Validate one record; returns the row to create or None if it was reported."""
+    if not isinstance(record, dict):
+        report.invalid.append({'line': line_number, 'error': "Expected a JSON object."})
+        return None
+    if '_error' in record:
+        report.invalid.append({'line': line_number, 'error': record['_error']})
+        return None
+    email = (record.get('email') or '').strip().lower()
+    name = record.get('name') or ''
+    try:
+        validate_email(email)
+        if len(name) > User._meta.get_field('name').max_length:
+            raise ValueError("Name is too long.")
+        # Money only enters a wallet through a transfer, with its ledger row.
+        if any(record.get(column) not in (None, '') for column in balance_columns()):
+            raise ValueError("Balances can't be provisioned; fund the wallet with a transfer.")
+        password = record.get('password') or None
+        password_hash = record.get('password_hash') or None
+        if password_hash:
+            identify_hasher(password_hash)
+        elif password and not re.match(PASSWORD_PATTERN, str(password)):
+            raise ValueError(PASSWORD_RULES)
+    except (ValidationError, ValueError) as e:
+        message = e.messages[0] if isinstance(e, ValidationError) else str(e)
+        report.invalid.append({'line': line_number, 'email': email, 'error': message})
+        return None
+    if email in seen:
+        report.duplicates.append(email)
+        return None
+    seen.add(email)
+    return {
+        'line': line_number,
+        'email': email,
+        'name': name,
+        'password': password,
+        'password_hash': password_hash,
+    }
+
+
+def hash_passwords(rows, pool, workers):
+    """
+    Fill in `password_hash` for rows without one. Rows without a password
+    get an unusable one, so those users have to reset it.
+    """
+    pending = [row for row in rows if not row['password_hash']]
+    passwords = [row['password'] for row in pending]
+    if pool is None:
+        hashes = map(make_password, passwords)
+    else:
+        hashes = pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4)))
+    for row, password_hash in zip(pending, hashes):
+        row['password_hash'] = password_hash
+
+
+def create_chunk(rows, report, attempts=3):
+    """Insert users and wallets for `rows`, skipping emails that already exist."""
+    for attempt in range(attempts):
+        existing = set(User.objects.filter(email__in=[row['email'] for row in rows]).values_list('email', flat=True))
+        if existing:
+            report.duplicates.extend(row['email'] for row in rows if row['email'] in existing)
+            rows = [row for row in rows if row['email'] not in existing]
+        if not rows:
+            return
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(email=row['email'], name=row['name'], password=row['password_hash'])
+                    for row in rows
+                ])
+                Wallet.objects.bulk_create([Wallet(user=user) for user in users])
+                # Replicas may not have the new users yet.
+                transaction.on_commit(lambda: routers.pin_to_primary([user.pk for user in users]))
+        except IntegrityError:
+            # Someone registered one of these emails meanwhile; look again.
+            if attempt == attempts - 1:
+                raise
+            continue
+        report.created += len(users)
+        return
+
+
+def provision(records, chunk_size=1000, workers=None, progress=None):
+    """
+    Create users and wallets for `records` (as yielded by `read_records`)
+    `chunk_size` at a time. Passwords are hashed in a pool of `workers`
+    processes (inline with 1 worker). Duplicate and invalid records are
+    reported and skipped. Returns a Report.
+    """
+    report = Report()
+    seen = set()
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(workers, initializer=init_worker) if workers > 1 else None
+    try:
+        for chunk in chunked(records, chunk_size):
+            rows = [row for row in (prepare(line, record, seen, report) for line, record in chunk) if row]
+            hash_passwords(rows, pool, workers)
+            create_chunk(rows, report)
+            if progress:
+                progress(report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report
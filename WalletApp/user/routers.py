@@ -0,0 +1,92 @@
+import functools
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_KEY = "db:pinned:{}"
+
+# Alias the current request reads from; None means the primary.
+_read_alias = ContextVar('read_alias', default=None)
+
+
+class PrimaryReplicaRouter(object):
+    """
+    Writes, and reads outside `reads_from_replica` views, go to the
+    primary. Reads inside those views go to the replica picked for the
+    request, unless the user is pinned to the primary after a transfer.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema from the primary.
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+def pin_to_primary(user_ids):
+    """Send the reads of `user_ids` to the primary for REPLICA_PIN_SECONDS."""
+    if settings.DATABASE_REPLICAS:
+        cache.set_many({PIN_KEY.format(user_id): True for user_id in user_ids}, settings.REPLICA_PIN_SECONDS)
+
+
+def read_may_be_stale(user_id):
+    """
+    Whether this request reads from a replica although `user_id` has made
+    a transfer since it started. The replica may not have that transfer
+    yet, so what was read from it mustn't be cached.
+    """
+    return _read_alias.get() is not None and bool(cache.get(PIN_KEY.format(user_id)))
+
+
+async def aread_may_be_stale(user_id):
+    return _read_alias.get() is not None and bool(await cache.aget(PIN_KEY.format(user_id)))
+
+
+@contextmanager
+def reading_from(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_for(pinned):
+    # Pins set in another worker's private cache can't be seen here.
+    if not settings.DATABASE_REPLICAS or pinned or not settings.CACHE_SHARED_BY_WORKERS:
+        return None
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def reads_from_replica(handler):
+    """
+    Run a view handler's reads on a replica, all on the same one, unless
+    the requesting user has just made a transfer or registered. Without a
+    cache shared by all workers they stay on the primary.
+    """
+    if iscoroutinefunction(handler):
+        @functools.wraps(handler)
+        async def wrapper(self, request, *args, **kwargs):
+            pinned = settings.DATABASE_REPLICAS and await cache.aget(PIN_KEY.format(request.user.pk))
+            with reading_from(replica_for(pinned)):
+                return await handler(self, request, *args, **kwargs)
+    else:
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            pinned = settings.DATABASE_REPLICAS and cache.get(PIN_KEY.format(request.user.pk))
+            with reading_from(replica_for(pinned)):
+                return handler(self, request, *args, **kwargs)
+    return wrapper
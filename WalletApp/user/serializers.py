@@ -1,134 +1,228 @@
-from .models import User, Transaction, Wallet
-from rest_framework import serializers
-import re
-from rest_framework_simplejwt.tokens import RefreshToken
-import time
-from datetime import datetime
-from django.contrib.auth import authenticate
-from django.contrib.auth.models import update_last_login
-
-class UserSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = User
-        fields = (
-            "name",
-            "email"
-        )
-    
-class LoginSerializer(serializers.Serializer):
-    email = serializers.EmailField()
-    password = serializers.CharField(max_length=128, write_only=True)
-    access = serializers.CharField(read_only=True)
-    refresh = serializers.CharField(read_only=True)
-    name = serializers.CharField(read_only=True)
-    id = serializers.CharField(read_only=True)
-
-    class Meta:
-        model = User
-        fields = ["email", "password"]
-
-    def create(self, validated_date):
-        pass
-    def update(self, instance, validated_data):
-        pass
-    
-    def validate_email(self, value):
-        try:
-            User.objects.get(email__iexact=value)
-        except User.DoesNotExist:
-            raise serializers.ValidationError(
-                _("This account doesn't exist. Please create a new account.")
-            )
-        return value
-
-    def validate(self, data):
-        email = data['email']
-        password = data['password']
-        user = authenticate(email=email, password=password)
-        if user is None:
-            raise serializers.ValidationError("Invalid login credentials")
-        try: 
-            user_obj = User.objects.get(email=user.email)
-            refresh = RefreshToken.for_user(user)
-            refresh_token = str(refresh)
-            access_token = str(refresh.access_token)
-            update_last_login(None, user)
-            validation = {
-                'access': access_token,
-                'refresh': refresh_token,
-                'email': user.email,
-                'name': user.name,
-                'id': user.id,
-            }
-            return validation
-        except:
-            raise serializers.ValidationError("Invalid ")
-
-class RegisterSerializer(serializers.ModelSerializer):
-    confirm_password = serializers.CharField(max_length=255, style={'input_type': 'password'}, write_only=True)
-    password = serializers.CharField(max_length=255, style={'input_type': 'password'}, write_only=True)
-
-    class Meta:
-        model = User
-        fields = (
-            "name",
-            "email",
-            "password",
-            "confirm_password",
-        )
-    def validate_email(self, value):
-        if value:
-            return value.lower()
-        return value
-
-    def validate(self, attrs):
-        print("attrs: - ", attrs)
-        if attrs["password"] != attrs["confirm_password"]:
-            raise serializers.ValidationError(
-                {"password": "Password fields didn't match."}
-            )
-        # validating password
-        password_val = attrs["password"]
-        regex_pattern = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?#&])[A-Za-z\d@$!%*?#&]{6,14}$"
-        is_email_regex_match = re.match(regex_pattern, password_val)
-        if not is_email_regex_match:
-            raise serializers.ValidationError(
-                {
-                    "password": "Password Length must be 6-14 characters, at least 1 caps, 1 small, 1 special char, 1 number."
-                }
-            )
-        return attrs 
-    
-    def create(self, validated_data):
-        validated_data.pop("confirm_password")
-        user = super(RegisterSerializer, self).create(validated_data)
-        user.set_password(validated_data["password"])
-        user.save()
-        # Create a wallet for the user
-        Wallet.objects.create(user=user)
-        return user
-
-class TransferSerializer(serializers.Serializer):
-    receiver_email = serializers.EmailField()
-    amount = serializers.DecimalField(max_digits=12, decimal_places=2)
-    from_currency = serializers.CharField(max_length=3, default='INR')
-    to_currency = serializers.CharField(max_length=3, default='INR')
-
-class TransactionListSerializer(serializers.ModelSerializer):
-    sender = UserSerializer(read_only=True)
-    receiver = UserSerializer(read_only=True)
-    class Meta:
-        model = Transaction
-        fields = (
-            'id', 'sender', 'receiver', 'amount', 'from_currency', 'to_currency', 'exchange_rate', 'transaction_type', 'created_at'
-        )
-
-class WalletSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Wallet
-        fields = (
-            "user",
-            "balance",
-            "usd_balance",
-        )
-    
\ No newline at end of file
+from .models import User, Transaction, Wallet, DailyTransactionSummary
+from rest_framework import serializers
+import re
+from rest_framework_simplejwt.tokens import RefreshToken
+import time
+from datetime import datetime
+from decimal import Decimal
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from django.db import transaction
+from . import last_login, money, routers
+
+# Passwords accepted at registration, and for provisioned users.
+PASSWORD_PATTERN = r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?#&])[A-Za-z\d@$!%*?#&]{6,14}$"
+PASSWORD_RULES = "Password Length must be 6-14 characters, at least 1 caps, 1 small, 1 special char, 1 number."
+
+class MoneyField(serializers.DecimalField):
+    """Major units with two decimal places on the wire, integer minor units in Python."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', 12)
+        kwargs.setdefault('decimal_places', money.DECIMAL_PLACES)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return money.to_minor(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        return money.to_major(value)
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = (
+            "name",
+            "email"
+        )
+    
+class LoginSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    password = serializers.CharField(max_length=128, write_only=True)
+    access = serializers.CharField(read_only=True)
+    refresh = serializers.CharField(read_only=True)
+    name = serializers.CharField(read_only=True)
+    id = serializers.CharField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ["email", "password"]
+
+    def create(self, validated_date):
+        pass
+    def update(self, instance, validated_data):
+        pass
+    
+    def validate_email(self, value):
+        # The one query of a login: the user found here is reused below.
+        try:
+            self.user = User.objects.get(email=value)
+        except User.DoesNotExist:
+            raise serializers.ValidationError(
+                _("This account doesn't exist. Please create a new account.")
+            )
+        return value
+
+    def validate(self, data):
+        user = self.user
+        if not (user.check_password(data['password']) and user.is_active):
+            raise serializers.ValidationError("Invalid login credentials")
+        refresh = RefreshToken.for_user(user)
+        last_login.record(user)
+        return {
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+            'email': user.email,
+            'name': user.name,
+            'id': user.id,
+        }
+
+class RegisterSerializer(serializers.ModelSerializer):
+    confirm_password = serializers.CharField(max_length=255, style={'input_type': 'password'}, write_only=True)
+    password = serializers.CharField(max_length=255, style={'input_type': 'password'}, write_only=True)
+
+    class Meta:
+        model = User
+        fields = (
+            "name",
+            "email",
+            "password",
+            "confirm_password",
+        )
+    def validate_email(self, value):
+        if value:
+            return value.lower()
+        return value
+
+    def validate(self, attrs):
+        print("attrs: - ", attrs)
+        if attrs["password"] != attrs["confirm_password"]:
+            raise serializers.ValidationError(
+                {"password": "Password fields didn't match."}
+            )
+        # validating password
+        password_val = attrs["password"]
+        is_email_regex_match = re.match(PASSWORD_PATTERN, password_val)
+        if not is_email_regex_match:
+            raise serializers.ValidationError(
+                {
+                    "password": PASSWORD_RULES
+                }
+            )
+        return attrs 
+    
+    def create(self, validated_data):
+        validated_data.pop("confirm_password")
+        password = validated_data.pop("password")
+        user = User(**validated_data)
+        user.set_password(password)
+        user.save()
+        # Create a wallet for the user
+        Wallet.objects.create(user=user)
+        # Replicas may not have the new wallet yet.
+        transaction.on_commit(lambda: routers.pin_to_primary([user.pk]))
+        return user
+
+class TransferSerializer(serializers.Serializer):
+    receiver_email = serializers.EmailField()
+    amount = MoneyField(min_value=Decimal('0.01'))
+    from_currency = serializers.CharField(max_length=3, default='INR')
+    to_currency = serializers.CharField(max_length=3, default='INR')
+
+    def validate_currency(self, value):
+        value = value.upper()
+        if value not in settings.WALLET_CURRENCIES:
+            raise serializers.ValidationError(
+                _("Unsupported currency. Choose one of: %s.") % ", ".join(settings.WALLET_CURRENCIES)
+            )
+        return value
+
+    def validate_from_currency(self, value):
+        return self.validate_currency(value)
+
+    def validate_to_currency(self, value):
+        return self.validate_currency(value)
+
+class BatchTransferSerializer(serializers.Serializer):
+    transfers = TransferSerializer(many=True, allow_empty=False, max_length=settings.BATCH_TRANSFER_MAX_ITEMS)
+
+class TransactionPageSerializer(serializers.ListSerializer):
+    """
+    Loads the senders and receivers of a whole page with one query and
+    serializes each of them once, however often they appear on the page.
+    Callers that already loaded them pass them as the `users` context.
+    """
+    @staticmethod
+    def user_ids(rows):
+        return {row.sender_id for row in rows} | {row.receiver_id for row in rows}
+
+    @staticmethod
+    def users_queryset():
+        return User.objects.only('id', 'name', 'email')
+
+    def to_representation(self, data):
+        rows = list(data.all() if hasattr(data, 'all') else data)
+        users = self.context.get('users')
+        if users is None:
+            users = self.users_queryset().in_bulk(self.user_ids(rows))
+        self.child.users_by_id = {pk: UserSerializer(user).data for pk, user in users.items()}
+        return super().to_representation(rows)
+
+class TransactionListSerializer(serializers.ModelSerializer):
+    sender = serializers.SerializerMethodField()
+    receiver = serializers.SerializerMethodField()
+    amount = MoneyField(source='leg_amount', read_only=True)
+    exchange_rate = serializers.FloatField(read_only=True)
+    transaction_type = serializers.CharField(read_only=True)
+    users_by_id = None
+
+    class Meta:
+        model = Transaction
+        list_serializer_class = TransactionPageSerializer
+        fields = (
+            'id', 'sender', 'receiver', 'amount', 'from_currency', 'to_currency', 'exchange_rate', 'transaction_type', 'created_at'
+        )
+
+    def get_sender(self, obj):
+        if self.users_by_id is not None:
+            return self.users_by_id.get(obj.sender_id)
+        return UserSerializer(obj.sender).data
+
+    def get_receiver(self, obj):
+        if self.users_by_id is not None:
+            return self.users_by_id.get(obj.receiver_id)
+        return UserSerializer(obj.receiver).data
+
+class WalletSerializer(serializers.Serializer):
+    """
+    Serializes {'user': id, 'balances': {currency: minor units}}. Every
+    WALLET_CURRENCIES entry is listed, at zero if the wallet has none;
+    `balance` and `usd_balance` repeat the INR and USD balances for
+    clients of the two-column wallet.
+    """
+    user = serializers.IntegerField(read_only=True)
+    balances = serializers.DictField(child=MoneyField(), read_only=True)
+
+    def to_representation(self, instance):
+        balances = dict.fromkeys(settings.WALLET_CURRENCIES, 0)
+        balances.update(instance['balances'])
+        data = super().to_representation({'user': instance['user'], 'balances': balances})
+        return {
+            'user': data['user'],
+            'balance': data['balances'].get('INR', money.to_major(0)),
+            'usd_balance': data['balances'].get('USD', money.to_major(0)),
+            'balances': data['balances'],
+        }
+
+class DailyTransactionSummarySerializer(serializers.ModelSerializer):
+    amount = MoneyField(read_only=True)
+
+    class Meta:
+        model = DailyTransactionSummary
+        fields = ('day', 'currency', 'transaction_type', 'count', 'amount')
+
+class TransactionSummaryTotalSerializer(serializers.Serializer):
+    currency = serializers.CharField(read_only=True)
+    transaction_type = serializers.CharField(read_only=True)
+    count = serializers.IntegerField(read_only=True)
+    amount = MoneyField(read_only=True)
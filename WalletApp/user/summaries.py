@@ -0,0 +1,241 @@
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from . import outbox, partitions
+from .models import DailyTransactionSummary, OutboxEvent, Transaction, User
+
+MAX_DAYS = 366
+
+# Outbox topic of ledger rows still to be added to their summaries.
+TOPIC = 'transactions.recorded'
+FIELDS = ('id', 'sender_id', 'receiver_id', 'amount', 'converted_amount', 'from_currency', 'to_currency')
+
+# (user, currency, amount) columns of each side of a ledger row.
+LEGS = {
+    'SENT': ('sender_id', 'from_currency', 'amount'),
+    'RECEIVED': ('receiver_id', 'to_currency', 'converted_amount'),
+}
+
+
+def increments(rows):
+    """
+    {(user_id, day, currency, transaction_type): (count, amount)} for
+    ledger `rows`. Transfers to oneself count once, as sent, as in the
+    transaction history.
+    """
+    counts, amounts = Counter(), Counter()
+    for row in rows:
+        day = timezone.localdate(row.created_at)
+        for transaction_type, (user_field, currency_field, amount_field) in LEGS.items():
+            if transaction_type == 'RECEIVED' and row.receiver_id == row.sender_id:
+                continue
+            key = (getattr(row, user_field), day, getattr(row, currency_field), transaction_type)
+            counts[key] += 1
+            amounts[key] += getattr(row, amount_field)
+    return {key: (counts[key], amounts[key]) for key in counts}
+
+
+def record(rows):
+    """
+    Add ledger `rows` to their summaries with one upsert. The rows are
+    taken in key order, so concurrent upserts cannot deadlock. Legs of
+    users deleted since the transfer are skipped; their summaries went
+    with them.
+    """
+    changes = increments(rows)
+    users = set(User.objects.filter(pk__in={key[0] for key in changes}).values_list('pk', flat=True))
+    changes = {key: change for key, change in changes.items() if key[0] in users}
+    if not changes:
+        return
+    quote = connection.ops.quote_name
+    table = quote(DailyTransactionSummary._meta.db_table)
+    columns = ('user_id', 'day', 'currency', 'transaction_type', 'count', 'amount')
+    keys = sorted(changes)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} ({', '.join(map(quote, columns))})
+            VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(keys))}
+            ON CONFLICT ({', '.join(map(quote, columns[:4]))}) DO UPDATE SET
+                {quote('count')} = {table}.{quote('count')} + EXCLUDED.{quote('count')},
+                {quote('amount')} = {table}.{quote('amount')} + EXCLUDED.{quote('amount')}
+            """,
+            [value for key in keys for value in (*key, *changes[key])],
+        )
+
+
+def queue(rows):
+    """
+    Leave ledger `rows` for the outbox worker to add to their summaries.
+    Call it in the transaction that writes the rows, after they are
+    written, so the transfer's locks aren't held for the summary upsert.
+    """
+    rows = [
+        {**{field: getattr(row, field) for field in FIELDS}, 'created_at': row.created_at.isoformat()}
+        for row in rows
+    ]
+    if rows:
+        outbox.publish(TOPIC, {'transactions': rows})
+
+
+def unqueued(payload):
+    return [
+        Transaction(**{**row, 'created_at': parse_datetime(row['created_at'])}) for row in payload['transactions']
+    ]
+
+
+@outbox.handler(TOPIC)
+def record_queued(payloads):
+    record([row for payload in payloads for row in unqueued(payload)])
+
+
+def day_bounds(date_from=None, date_to=None):
+    """created_at bounds of the days from `date_from` to `date_to`, inclusive."""
+    bounds = {}
+    if date_from:
+        bounds['created_at__gte'] = timezone.make_aware(datetime.combine(date_from, time.min))
+    if date_to:
+        bounds['created_at__lt'] = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    return bounds
+
+
+def first_live_day():
+    """
+    The first day all of whose transfers are in the transaction table, or
+    None if it isn't partitioned. Earlier months have been archived, so
+    their summaries are all that is left of them.
+    """
+    if not partitions.is_partitioned():
+        return None
+    months = partitions.partitions()
+    if not months:
+        return None
+    start = partitions.bound(min(months))
+    day = timezone.localdate(start)
+    if timezone.make_aware(datetime.combine(day, time.min)) < start:
+        day += timedelta(days=1)
+    return day
+
+
+def rebuild(date_from=None, date_to=None, batch_size=2000):
+    """
+    Recompute the summaries of the days from `date_from` to `date_to`
+    (either end open if None) from the ledger. Days before
+    `first_live_day()` are left alone, and a range that ends before it is
+    refused with ValueError. Returns the number of summary rows written.
+    """
+    first_day = first_live_day()
+    if first_day:
+        if date_to and date_to < first_day:
+            raise ValueError(f"Transfers before {first_day} are archived; their summaries can't be rebuilt.")
+        date_from = max(date_from or first_day, first_day)
+    summaries = DailyTransactionSummary.objects.all()
+    if date_from:
+        summaries = summaries.filter(day__gte=date_from)
+    if date_to:
+        summaries = summaries.filter(day__lte=date_to)
+    ledger = Transaction.objects.filter(**day_bounds(date_from, date_to))
+
+    written = 0
+    outermost = connection.get_autocommit()
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Outbox workers wait before touching the summaries until the
+            # rebuild commits; transfers, which only queue events, and
+            # reads carry on. Every query below sees the ledger and the
+            # outbox as of the same moment.
+            with connection.cursor() as cursor:
+                if outermost:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                cursor.execute(
+                    f"LOCK TABLE {connection.ops.quote_name(DailyTransactionSummary._meta.db_table)} IN EXCLUSIVE MODE"
+                )
+        queued, held = claim_queued()
+        ledger = ledger.exclude(pk__in=held)
+        drop_queued(queued, date_from, date_to)
+        summaries.delete()
+        for transaction_type, (user_field, currency_field, amount_field) in LEGS.items():
+            legs = ledger
+            if transaction_type == 'RECEIVED':
+                legs = legs.exclude(sender=F('receiver'))
+            groups = (
+                legs.annotate(day=TruncDate('created_at'))
+                .values(user_field, 'day', currency_field)
+                .annotate(transfers=Count('id'), total=Sum(amount_field))
+                .order_by()
+            )
+            batch = []
+            for group in groups.iterator(chunk_size=batch_size):
+                batch.append(DailyTransactionSummary(
+                    user_id=group[user_field],
+                    day=group['day'],
+                    currency=group[currency_field],
+                    transaction_type=transaction_type,
+                    count=group['transfers'],
+                    amount=group['total'],
+                ))
+                if len(batch) >= batch_size:
+                    written += len(DailyTransactionSummary.objects.bulk_create(batch))
+                    batch = []
+            written += len(DailyTransactionSummary.objects.bulk_create(batch))
+    return written
+
+
+def claim_queued():
+    """
+    Lock the queued events of TOPIC that no outbox worker holds, skipping
+    the others. Returns the locked events and the ids of the ledger rows
+    in the skipped ones: their worker adds those to the summaries once
+    the rebuild commits, so the rebuild leaves them out.
+    """
+    queued = list(OutboxEvent.objects.filter(topic=TOPIC).select_for_update(skip_locked=True))
+    held = [
+        row['id']
+        for event in OutboxEvent.objects.filter(topic=TOPIC).exclude(pk__in=[event.pk for event in queued])
+        for row in event.payload['transactions']
+    ]
+    return queued, held
+
+
+def drop_queued(events, date_from=None, date_to=None):
+    """
+    Take the ledger rows of the days from `date_from` to `date_to` out of
+    queued `events`, as a rebuild of those days already counts them.
+    """
+    for event in events:
+        rows = [
+            row for row in event.payload['transactions']
+            if not (date_from or date.min) <= timezone.localdate(parse_datetime(row['created_at'])) <= (date_to or date.max)
+        ]
+        if not rows:
+            event.delete()
+        elif len(rows) < len(event.payload['transactions']):
+            event.payload = {'transactions': rows}
+            event.save(update_fields=['payload'])
+
+
+def for_user(user, date_from, date_to, currency=None, transaction_type=None):
+    """The summary rows of `user` from `date_from` to `date_to`, oldest first."""
+    rows = DailyTransactionSummary.objects.filter(user=user, day__gte=date_from, day__lte=date_to)
+    if currency:
+        rows = rows.filter(currency=currency)
+    if transaction_type:
+        rows = rows.filter(transaction_type=transaction_type)
+    return rows.order_by('day', 'currency', 'transaction_type')
+
+
+def totals(rows):
+    """Count and amount per (currency, transaction_type) over summary `rows`."""
+    counts, amounts = Counter(), Counter()
+    for row in rows:
+        counts[(row.currency, row.transaction_type)] += row.count
+        amounts[(row.currency, row.transaction_type)] += row.amount
+    return [
+        {'currency': currency, 'transaction_type': transaction_type,
+         'count': counts[(currency, transaction_type)], 'amount': amounts[(currency, transaction_type)]}
+        for currency, transaction_type in sorted(counts)
+    ]
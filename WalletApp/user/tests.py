@@ -1,3 +1,452 @@
-from django.test import TestCase
-
-# Create your tests here.
+import threading
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache, caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .models import User, Wallet, WalletBalance, Transaction, DailyTransactionSummary, OutboxEvent
+from . import exchange, last_login, outbox, partitions, transfers
+
+# Create your tests here.
+
+def create_wallet_user(email, **balances):
+    """A user with a wallet holding `balances`, currency=minor units."""
+    user = User.objects.create_user(email=email, password='Passw0rd!', name=email.split('@')[0])
+    wallet = Wallet.objects.create(user=user)
+    WalletBalance.objects.bulk_create(
+        [WalletBalance(wallet=wallet, currency=currency, amount=amount) for currency, amount in balances.items()]
+    )
+    return user
+
+
+def set_exchange_rate(from_currency, to_currency, rate):
+    # Goes through the rate cache, so the views never call the provider.
+    exchange.rate_cache.get(from_currency, to_currency, lambda *pair: Decimal(rate))
+
+
+def balance_of(user, currency):
+    return WalletBalance.objects.get(wallet__user=user, currency=currency).amount
+
+
+class LoginQueryCountTest(TestCase):
+    def setUp(self):
+        last_login.buffer.flush()
+        self.user = User.objects.create_user(email='login@example.com', password='Passw0rd!', name='login')
+        self.client = APIClient()
+
+    def login(self, password='Passw0rd!'):
+        return self.client.post('/api/login', {'email': 'login@example.com', 'password': password}, format='json')
+
+    def test_login_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json()['data'])
+
+    def test_last_login_is_written_in_one_batch(self):
+        self.login()
+        self.assertIsNone(User.objects.get(pk=self.user.pk).last_login)
+        with self.assertNumQueries(1):
+            self.assertEqual(last_login.buffer.flush(), 1)
+        self.assertIsNotNone(User.objects.get(pk=self.user.pk).last_login)
+
+    @override_settings(LAST_LOGIN_FLUSH_INTERVAL=0)
+    def test_last_login_written_immediately_without_interval(self):
+        with self.assertNumQueries(2):
+            self.login()
+        self.assertIsNotNone(User.objects.get(pk=self.user.pk).last_login)
+
+    def test_wrong_password(self):
+        with self.assertNumQueries(1):
+            response = self.login(password='wrong')
+        self.assertEqual(response.status_code, 400)
+
+
+class CachedAuthenticationTest(TestCase):
+    def setUp(self):
+        caches['auth'].clear()
+        self.user = User.objects.create_user(email='auth@example.com', password='Passw0rd!', name='auth')
+        Wallet.objects.create(user=self.user)
+        self.client = APIClient()
+        response = self.client.post('/api/login', {'email': 'auth@example.com', 'password': 'Passw0rd!'}, format='json')
+        self.tokens = response.json()['data']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.tokens['access'])
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/wallet')
+        self.assertEqual(response.status_code, 200)
+        return [query for query in queries if 'FROM "user_user"' in query['sql']]
+
+    def test_user_is_loaded_once(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(len(self.user_queries()), 0)
+
+    def test_deactivation_is_seen_immediately(self):
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/wallet').status_code, 401)
+
+    def test_blacklist_drops_cached_user(self):
+        self.user_queries()
+        response = APIClient().post('/api/api/token/blacklist/', {'refresh': self.tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.user_queries()), 1)
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        exchange.rate_cache.clear()
+        set_exchange_rate('INR', 'USD', '0.012')
+        self.sender = create_wallet_user('sender@example.com', INR=100000)
+        self.receiver = create_wallet_user('receiver@example.com', USD=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender)
+
+    def tearDown(self):
+        exchange.rate_cache.clear()
+
+    def transfer(self, amount, path='/api/transfer'):
+        return self.client.post(path, {
+            'receiver_email': 'receiver@example.com', 'amount': amount, 'from_currency': 'INR', 'to_currency': 'USD',
+        }, format='json')
+
+    def test_transfer(self):
+        response = self.transfer('100.00')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(balance_of(self.sender, 'INR'), 90000)
+        self.assertEqual(balance_of(self.receiver, 'USD'), 120)
+
+    def test_amount_too_small_to_convert(self):
+        for path in ('/api/transfer', '/api/async/transfer'):
+            with self.subTest(path=path):
+                response = self.transfer('0.01', path)
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertEqual(response.json()['msg'], "Amount is too small to convert.")
+        self.assertEqual(balance_of(self.sender, 'INR'), 100000)
+        self.assertFalse(Transaction.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Row locks are checked on PostgreSQL.")
+class ConcurrentTransferTest(TransactionTestCase):
+    def test_opposite_directions_dont_deadlock(self):
+        first = create_wallet_user('first@example.com', INR=100000)
+        second = create_wallet_user('second@example.com', INR=100000)
+        threads_per_direction, transfers_per_thread = 4, 10
+        start = threading.Barrier(2 * threads_per_direction)
+        errors = []
+
+        def send(sender, receiver):
+            try:
+                start.wait()
+                for _ in range(transfers_per_thread):
+                    transfers.execute_transfer(
+                        sender, receiver, 100, 100, 'INR', 'INR', Decimal('1.0'), '127.0.0.1'
+                    )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=send, args=pair)
+            for pair in [(first, second), (second, first)] * threads_per_direction
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(balance_of(first, 'INR') + balance_of(second, 'INR'), 200000)
+        self.assertEqual(balance_of(first, 'INR'), 100000)
+        self.assertEqual(Transaction.objects.count(), 2 * threads_per_direction * transfers_per_thread)
+
+
+class BalanceRowsTest(TestCase):
+    def setUp(self):
+        self.user = create_wallet_user('rows@example.com', INR=1000)
+
+    def test_missing_rows_are_created_at_zero(self):
+        with transaction.atomic():
+            balances = transfers.lock_balances([(self.user.pk, 'INR'), (self.user.pk, 'USD')])
+        self.assertEqual(balances[(self.user.pk, 'INR')].amount, 1000)
+        self.assertEqual(balances[(self.user.pk, 'USD')].amount, 0)
+        self.assertEqual(balance_of(self.user, 'USD'), 0)
+
+    def test_transfer_to_a_currency_the_receiver_lacks(self):
+        receiver = create_wallet_user('rows-receiver@example.com')
+        transfers.execute_transfer(self.user, receiver, 1000, 12, 'INR', 'USD', Decimal('0.012'), '127.0.0.1')
+        self.assertEqual(balance_of(self.user, 'INR'), 0)
+        self.assertEqual(balance_of(receiver, 'USD'), 12)
+        self.assertFalse(WalletBalance.objects.filter(wallet__user=receiver, currency='INR').exists())
+
+
+class IdempotentTransferTest(TestCase):
+    def setUp(self):
+        self.sender = create_wallet_user('idem-sender@example.com', INR=100000)
+        self.receiver = create_wallet_user('idem-receiver@example.com', INR=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender)
+
+    def transfer(self, amount, key='transfer-1'):
+        return self.client.post(
+            '/api/transfer', {'receiver_email': 'idem-receiver@example.com', 'amount': amount},
+            format='json', headers={'Idempotency-Key': key},
+        )
+
+    def test_retry_is_replayed(self):
+        first = self.transfer('100.00')
+        self.assertEqual(first.status_code, 200, first.content)
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+        retry = self.transfer('100.00')
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(balance_of(self.sender, 'INR'), 90000)
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_reused_for_another_request(self):
+        self.transfer('100.00')
+        response = self.transfer('200.00')
+        self.assertEqual(response.status_code, 422, response.content)
+        self.assertEqual(balance_of(self.sender, 'INR'), 90000)
+        self.assertEqual(self.transfer('200.00', key='transfer-2').status_code, 200)
+        self.assertEqual(balance_of(self.sender, 'INR'), 70000)
+
+
+class BatchTransferTest(TestCase):
+    def setUp(self):
+        self.sender = create_wallet_user('batch-sender@example.com', INR=100000)
+        self.first = create_wallet_user('batch-first@example.com', INR=0)
+        self.second = create_wallet_user('batch-second@example.com', INR=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender)
+
+    def test_partial_failure(self):
+        response = self.client.post('/api/transfer/batch', {'transfers': [
+            {'receiver_email': 'batch-first@example.com', 'amount': '100.00'},
+            {'receiver_email': 'nobody@example.com', 'amount': '10.00'},
+            {'receiver_email': 'batch-second@example.com', 'amount': '5000.00'},
+            {'receiver_email': 'batch-second@example.com', 'amount': '50.00'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()['data']
+        self.assertEqual((data['succeeded'], data['failed']), (2, 2))
+        self.assertEqual(
+            [(result['status'], result['error']) for result in data['results']],
+            [('success', None), ('failed', "Receiver not found"),
+             ('failed', "Insufficient INR balance."), ('success', None)],
+        )
+        self.assertEqual(balance_of(self.sender, 'INR'), 85000)
+        self.assertEqual(balance_of(self.first, 'INR'), 10000)
+        self.assertEqual(balance_of(self.second, 'INR'), 5000)
+        self.assertEqual(
+            sorted(Transaction.objects.values_list('receiver_id', 'amount')),
+            sorted([(self.first.pk, 10000), (self.second.pk, 5000)]),
+        )
+
+
+class WalletCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        exchange.rate_cache.clear()
+        set_exchange_rate('INR', 'USD', '0.012')
+        self.sender = create_wallet_user('wallet-sender@example.com', INR=100000, USD=0)
+        create_wallet_user('wallet-receiver@example.com', INR=0, USD=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.sender)
+
+    def tearDown(self):
+        exchange.rate_cache.clear()
+
+    def balances(self):
+        response = self.client.get('/api/wallet')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['data']['balances']
+
+    def transfer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/transfer', {
+                'receiver_email': 'wallet-receiver@example.com', 'amount': '100.00',
+                'from_currency': 'INR', 'to_currency': 'USD',
+            }, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    @override_settings(CACHE_SHARED_BY_WORKERS=True)
+    def test_transfer_invalidates_cached_wallet(self):
+        self.assertEqual(self.balances()['INR'], 1000)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.balances()['INR'], 1000)
+        self.transfer()
+        self.assertEqual(self.balances()['INR'], 900)
+
+    @override_settings(CACHE_SHARED_BY_WORKERS=False)
+    def test_not_cached_without_shared_cache(self):
+        self.balances()
+        with self.assertNumQueries(1):
+            self.balances()
+
+
+class SummaryOutboxTest(TestCase):
+    def setUp(self):
+        self.sender = create_wallet_user('summary-sender@example.com', INR=10000)
+        self.receiver = create_wallet_user('summary-receiver@example.com', INR=0)
+
+    def test_deleted_receiver_is_skipped(self):
+        transfers.execute_transfer(self.sender, self.receiver, 1000, 1000, 'INR', 'INR', Decimal('1.0'), '127.0.0.1')
+        self.receiver.delete()
+        self.assertEqual(outbox.process_batch(), (1, 0))
+        self.assertFalse(OutboxEvent.objects.exists())
+        summary = DailyTransactionSummary.objects.get()
+        self.assertEqual((summary.user_id, summary.transaction_type), (self.sender.pk, 'SENT'))
+
+
+class TransactionListQueryCountTest(TestCase):
+    """The history endpoint runs the same queries however many rows a page holds."""
+    page_sizes = (10, 50, 500)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='history@example.com', password='Passw0rd!', name='history')
+        others = User.objects.bulk_create(
+            [User(email=f"history-{i}@example.com", name=f"history-{i}") for i in range(50)]
+        )
+        rows = 2 * max(cls.page_sizes)
+        Transaction.objects.bulk_create([
+            Transaction(
+                sender=cls.user if i % 2 else others[i % 50], receiver=others[i % 50] if i % 2 else cls.user,
+                amount=1000, converted_amount=1000, ip_address='127.0.0.1',
+            )
+            for i in range(rows)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_page_number_pagination(self):
+        # Two counts, one per branch, then the UNION page and one in_bulk of users.
+        for page_size in self.page_sizes:
+            for page in (1, 2):
+                with self.subTest(page_size=page_size, page=page):
+                    with self.assertNumQueries(4):
+                        response = self.client.get('/api/transactions', {'page': page, 'page_size': page_size})
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.json()['data']['results']), page_size)
+
+    def test_cursor_pagination(self):
+        # The UNION page and one in_bulk of users.
+        for page_size in self.page_sizes:
+            with self.subTest(page_size=page_size):
+                with self.assertNumQueries(2):
+                    response = self.client.get('/api/transactions', {'cursor': '', 'page_size': page_size})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['data']['results']), page_size)
+                with self.assertNumQueries(2):
+                    response = self.client.get(response.json()['data']['next'])
+                self.assertEqual(len(response.json()['data']['results']), page_size)
+
+class TransactionCursorTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='cursor@example.com', password='Passw0rd!', name='cursor')
+        other = User.objects.create_user(email='cursor-other@example.com', password='Passw0rd!', name='other')
+        now = timezone.now()
+        # Several rows share a timestamp, so pages split between equal ones.
+        rows = Transaction.objects.bulk_create([
+            Transaction(
+                sender=self.user if i % 2 else other, receiver=other if i % 2 else self.user,
+                amount=100, converted_amount=100, ip_address='127.0.0.1', created_at=now - timedelta(seconds=i // 3),
+            )
+            for i in range(25)
+        ])
+        self.ids = [row.pk for row in sorted(rows, key=lambda row: (row.created_at, row.pk), reverse=True)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        data = response.json()['data']
+        return [row['id'] for row in data['results']], data['next'], data['previous']
+
+    def test_next_and_previous(self):
+        pages = []
+        ids, next_url, previous_url = self.page('/api/transactions', {'cursor': '', 'page_size': 7})
+        self.assertIsNone(previous_url)
+        pages.append(ids)
+        while next_url:
+            ids, next_url, previous_url = self.page(next_url)
+            pages.append(ids)
+        self.assertEqual([len(ids) for ids in pages], [7, 7, 7, 4])
+        self.assertEqual([pk for ids in pages for pk in ids], self.ids)
+
+        back = []
+        while previous_url:
+            ids, _, previous_url = self.page(previous_url)
+            back.insert(0, ids)
+        self.assertEqual(back, pages[:-1])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/transactions', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['msg'], "Invalid cursor.")
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Query plans are checked on PostgreSQL.")
+class TransactionHistoryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(email=f"plan-{i}@example.com", name=f"plan-{i}") for i in range(200)])
+        cls.user = users[0]
+        if partitions.is_partitioned():
+            partitions.ensure_partitions(0, start=timezone.now() - timedelta(days=60))
+        first, last = users[0].pk, users[-1].pk
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Transaction._meta.db_table}
+                    (sender_id, receiver_id, amount, converted_amount, from_currency, to_currency,
+                     exchange_rate, ip_address, created_at)
+                SELECT %s + (random() * (%s - %s))::bigint, %s + (random() * (%s - %s))::bigint,
+                       1000, 1000, 'INR', 'INR', 1, '127.0.0.1', now() - random() * interval '30 days'
+                FROM generate_series(1, 20000)
+                """,
+                [first, last, first, first, last, first],
+            )
+            cursor.execute(f"ANALYZE {Transaction._meta.db_table}")
+
+    def index_names(self, name):
+        """`name` and, on a partitioned table, the indexes of its partitions."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class child ON child.oid = inhrelid JOIN pg_class parent ON parent.oid = inhparent
+                WHERE parent.relname = %s
+                """,
+                [name],
+            )
+            return {name, *(row[0] for row in cursor.fetchall())}
+
+    def assertUsesIndex(self, plan, name):
+        self.assertNotIn('Seq Scan', plan)
+        self.assertTrue(any(f" using {index} " in plan for index in self.index_names(name)), plan)
+
+    def test_sent_branch_uses_sender_index(self):
+        self.assertUsesIndex(Transaction.objects.history(self.user, 'SENT')[:11].explain(), 'txn_sender_created_idx')
+
+    def test_received_branch_uses_receiver_index(self):
+        self.assertUsesIndex(
+            Transaction.objects.history(self.user, 'RECEIVED')[:11].explain(), 'txn_receiver_created_idx'
+        )
+
+    def test_history_uses_both_indexes(self):
+        plan = Transaction.objects.history(self.user)[:11].explain()
+        self.assertUsesIndex(plan, 'txn_sender_created_idx')
+        self.assertUsesIndex(plan, 'txn_receiver_created_idx')
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from . import metrics
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def get_client_ip(request):
+    """
+    The first X-Forwarded-For address, or REMOTE_ADDR. With
+    REST_FRAMEWORK['NUM_PROXIES'] set, the address that many entries from
+    the end instead, which clients can't choose themselves.
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    num_proxies = api_settings.NUM_PROXIES
+    if num_proxies is not None:
+        if num_proxies == 0 or not x_forwarded_for:
+            return request.META.get('REMOTE_ADDR')
+        addresses = [address.strip() for address in x_forwarded_for.split(',')]
+        return addresses[-min(num_proxies, len(addresses))]
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0]
+    return request.META.get('REMOTE_ADDR')
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60): a bucket of 10 tokens refilled over 60 seconds."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period.strip()[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per client, kept in the default cache: a bucket holds up
+    to N tokens of the view's `<throttle_scope>_<kind>` rate "N/period"
+    and refills continuously over the period. Views without a scope, or
+    scopes without a rate, aren't throttled. Like DRF's own throttles,
+    concurrent requests of one client can race for the last token. With a
+    per-process cache the rate applies per worker process.
+    """
+    kind = None
+
+    def get_ident(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"{scope}_{self.kind}") if scope else None
+        ident = self.get_ident(request) if rate else None
+        if not ident:
+            return True
+        capacity, period = parse_rate(rate)
+        key = f"throttle:{scope}:{self.kind}:{hashlib.sha256(str(ident).encode()).hexdigest()[:32]}"
+        now = time.time()
+        tokens, updated = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * capacity / period)
+        self.wait_seconds = None
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) * period / capacity
+            metrics.throttled.inc(scope, self.kind)
+        else:
+            tokens -= 1
+        cache.set(key, (tokens, now), period)
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ScopedIPThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_ident(self, request):
+        return get_client_ip(request)
+
+
+class ScopedUserThrottle(TokenBucketThrottle):
+    """Per account: the signed-in user, or the email a login is trying."""
+    kind = 'user'
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        return str(email).strip().lower() if email else None
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many requests in progress, try again shortly."
+    default_code = 'overloaded'
+    wait = 1  # seconds, sent as Retry-After
+
+
+class ConcurrencyLimit(object):
+    """
+    At most `limit` requests of one kind in progress in this process; the
+    next ones are turned away with 503 at once instead of queueing for a
+    worker or a database connection. A limit of 0 disables it.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self._semaphore = threading.BoundedSemaphore(limit) if limit else None
+
+    @contextmanager
+    def slot(self):
+        if self._semaphore is None:
+            yield
+            return
+        if not self._semaphore.acquire(blocking=False):
+            metrics.shed.inc(self.name)
+            raise Overloaded()
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+
+transfer_slots = ConcurrencyLimit('transfer', settings.TRANSFER_MAX_CONCURRENCY)
@@ -0,0 +1,227 @@
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import User, Wallet, WalletBalance, Transaction
+from . import metrics, money, routers, summaries, wallet_cache
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+def locked_balances(keys):
+    query = Q()
+    for user_id, currency in keys:
+        query |= Q(wallet__user_id=user_id, currency=currency)
+    rows = (
+        WalletBalance.objects.select_for_update(of=('self',))
+        .filter(query)
+        .annotate(user_id=F('wallet__user_id'))
+        .order_by('pk')
+    )
+    return {(row.user_id, row.currency): row for row in rows}
+
+
+def lock_balances(keys):
+    """
+    Lock the balance rows of `keys`, (user_id, currency) pairs, in primary
+    key order, so two transfers between the same balances in opposite
+    directions cannot deadlock. Missing rows are created at zero first.
+    Only these rows are locked, not the wallets or their other balances.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+    balances = locked_balances(keys)
+    missing = keys - balances.keys()
+    if missing:
+        user_ids = {user_id for user_id, _ in missing}
+        wallets = dict(Wallet.objects.filter(user_id__in=user_ids).values_list('user_id', 'pk'))
+        if len(wallets) != len(user_ids):
+            raise Wallet.DoesNotExist("Wallet not found.")
+        # In a fixed order too: concurrent inserts of the same new rows
+        # wait on each other's unique index entries.
+        WalletBalance.objects.bulk_create(
+            [WalletBalance(wallet_id=wallets[user_id], currency=currency) for user_id, currency in sorted(missing)],
+            ignore_conflicts=True,
+        )
+        balances = locked_balances(keys)
+    return balances
+
+
+def check_positive(amount):
+    # A negative amount would pass the balance check and move money backwards.
+    if amount <= 0:
+        raise ValueError(f"Transfer amounts must be positive, got {amount}.")
+
+
+def debit(balance, amount):
+    check_positive(amount)
+    updated = WalletBalance.objects.filter(pk=balance.pk, amount__gte=amount).update(
+        amount=F('amount') - amount, updated_at=timezone.now()
+    )
+    if not updated:
+        raise InsufficientBalance(f"Insufficient {balance.currency} balance.")
+
+
+def credit(balance, amount):
+    check_positive(amount)
+    WalletBalance.objects.filter(pk=balance.pk).update(amount=F('amount') + amount, updated_at=timezone.now())
+
+
+def ledger_row(sender, receiver, amount, converted_amount, from_currency, to_currency,
+               exchange_rate, ip_address):
+    return Transaction(
+        sender=sender,
+        receiver=receiver,
+        amount=amount,
+        converted_amount=converted_amount,
+        from_currency=from_currency,
+        to_currency=to_currency,
+        exchange_rate=exchange_rate,
+        ip_address=ip_address,
+    )
+
+
+def invalidate_wallets(user_ids):
+    """
+    Drop the cached balances of `user_ids` now and again once the transfer
+    has committed, so a read that starts after the response never sees
+    the balance from before the transfer. The users read from the primary
+    for a while, so a lagging replica doesn't refill the cache either.
+    """
+    user_ids = list(user_ids)
+    wallet_cache.invalidate(*user_ids)
+
+    def committed():
+        # Pin first: a replica read that checks the pin before it is set
+        # caches under a generation the invalidation below drops.
+        routers.pin_to_primary(user_ids)
+        wallet_cache.invalidate(*user_ids)
+    transaction.on_commit(committed)
+
+
+@contextmanager
+def counted(kind):
+    """Count a transfer as committed once its transaction commits, or as rolled back if it raises."""
+    try:
+        yield
+    except Exception:
+        metrics.transfers.inc(kind, 'rollback')
+        raise
+    transaction.on_commit(lambda: metrics.transfers.inc(kind, 'commit'))
+
+
+def execute_transfer(sender, receiver, amount, converted_amount, from_currency, to_currency,
+                     exchange_rate, ip_address):
+    with counted('single'), transaction.atomic():
+        balances = lock_balances([(sender.pk, from_currency), (receiver.pk, to_currency)])
+        invalidate_wallets({sender.pk, receiver.pk})
+        debit(balances[(sender.pk, from_currency)], amount)
+        credit(balances[(receiver.pk, to_currency)], converted_amount)
+        row = ledger_row(
+            sender, receiver, amount, converted_amount, from_currency, to_currency,
+            exchange_rate, ip_address,
+        )
+        row.save(force_insert=True)
+        summaries.queue([row])
+
+
+def execute_batch_transfer(sender, items, ip_address, get_exchange_rate):
+    """
+    Apply many transfers from `sender` in one atomic unit.
+
+    Receivers are resolved in one query and each currency pair's rate is
+    fetched once. Items that cannot be applied (unknown receiver, missing
+    rate, insufficient balance) are reported as failed and the rest are
+    committed together. Item amounts are in minor units; returns one
+    result dict per item, in input order, with amounts in major units.
+    """
+    receivers = User.objects.in_bulk({item['receiver_email'] for item in items}, field_name='email')
+
+    rates = {}
+    for item in items:
+        pair = (item['from_currency'], item['to_currency'])
+        if pair not in rates:
+            try:
+                rates[pair] = get_exchange_rate(*pair)
+            except Exception:
+                rates[pair] = None
+
+    results = []
+    pending = []
+    for index, item in enumerate(items):
+        result = {
+            'index': index,
+            'receiver_email': item['receiver_email'],
+            'amount': money.to_major(item['amount']),
+            'from_currency': item['from_currency'],
+            'to_currency': item['to_currency'],
+            'status': 'failed',
+            'error': None,
+        }
+        results.append(result)
+        receiver = receivers.get(item['receiver_email'])
+        exchange_rate = rates[(item['from_currency'], item['to_currency'])]
+        if item['amount'] <= 0:
+            result['error'] = "Amount must be positive."
+        elif receiver is None:
+            result['error'] = "Receiver not found"
+        elif exchange_rate is None:
+            result['error'] = "Exchange rate is currently unavailable."
+        else:
+            pending.append((result, receiver, item, exchange_rate))
+
+    with counted('batch'), transaction.atomic():
+        wallet_users = set(
+            Wallet.objects.filter(user_id__in={sender.pk} | {receiver.pk for _, receiver, _, _ in pending})
+            .values_list('user_id', flat=True)
+        )
+        if sender.pk not in wallet_users:
+            raise Wallet.DoesNotExist("Wallet not found.")
+        for result, receiver, _, _ in pending:
+            if receiver.pk not in wallet_users:
+                result['error'] = "Wallet not found."
+        pending = [entry for entry in pending if entry[1].pk in wallet_users]
+
+        balances = lock_balances(
+            {(sender.pk, item['from_currency']) for _, _, item, _ in pending}
+            | {(receiver.pk, item['to_currency']) for _, receiver, item, _ in pending}
+        )
+        amounts = {key: balance.amount for key, balance in balances.items()}
+
+        rows = []
+        for result, receiver, item, exchange_rate in pending:
+            amount = item['amount']
+            debit_key = (sender.pk, item['from_currency'])
+            credit_key = (receiver.pk, item['to_currency'])
+            if amounts[debit_key] < amount:
+                result['error'] = f"Insufficient {item['from_currency']} balance."
+                continue
+            converted_amount = money.convert(amount, exchange_rate)
+            if converted_amount <= 0:
+                result['error'] = "Amount is too small to convert."
+                continue
+            amounts[debit_key] -= amount
+            amounts[credit_key] += converted_amount
+            rows.append(ledger_row(
+                sender, receiver, amount, converted_amount, item['from_currency'], item['to_currency'],
+                exchange_rate, ip_address,
+            ))
+            result.update(
+                status='success', converted_amount=money.to_major(converted_amount), exchange_rate=exchange_rate
+            )
+
+        if rows:
+            invalidate_wallets({user_id for user_id, _ in balances})
+            now = timezone.now()
+            changed = []
+            for key, balance in balances.items():
+                if balance.amount != amounts[key]:
+                    balance.amount, balance.updated_at = amounts[key], now
+                    changed.append(balance)
+            WalletBalance.objects.bulk_update(changed, ['amount', 'updated_at'])
+            Transaction.objects.bulk_create(rows)
+            summaries.queue(rows)
+    return results
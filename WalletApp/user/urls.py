@@ -1,28 +1,42 @@
-from django.contrib import admin
-from django.urls import path
-from django.conf.urls.static import static
-from rest_framework_simplejwt import views as jwt_views
-from rest_framework_simplejwt.views import TokenBlacklistView
-from django.conf import settings
-from .views import *
-from . import views
-urlpatterns = [
-
-    # Token related urls.
-    path('token/obtain/', jwt_views.TokenObtainPairView.as_view(), name='token_create'),
-    path('token/refresh/', jwt_views.TokenRefreshView.as_view(), name='token_refresh'),
-    path('api/token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
-
-    # Authentications API's URL
-    path('register', AuthUserRegisterView.as_view(), name='register'),
-    path('login', AuthUserLoginView.as_view(), name='login'),
-
-    # Wallet API's URL
-    path('wallet', WalletView.as_view(), name='wallet'),
-
-    # Transfer API's URL
-    path('transfer', TransferView.as_view(), name='transfer'),
-    
-    # Transaction API's URL
-    path('transactions', TransactionListView.as_view(), name='transactions'),
-]
\ No newline at end of file
+from django.contrib import admin
+from django.urls import path
+from django.conf.urls.static import static
+from rest_framework_simplejwt import views as jwt_views
+from django.conf import settings
+from .views import *
+from . import views
+from .async_views import AsyncWalletView, AsyncTransferView, AsyncTransactionListView
+urlpatterns = [
+
+    # Token related urls.
+    path('token/obtain/', jwt_views.TokenObtainPairView.as_view(), name='token_create'),
+    path('token/refresh/', jwt_views.TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/blacklist/', TokenBlacklistView.as_view(), name='token_blacklist'),
+
+    # Authentications API's URL
+    path('register', AuthUserRegisterView.as_view(), name='register'),
+    path('login', AuthUserLoginView.as_view(), name='login'),
+
+    # Wallet API's URL
+    path('wallet', WalletView.as_view(), name='wallet'),
+
+    # Transfer API's URL
+    path('transfer', TransferView.as_view(), name='transfer'),
+    path('transfer/batch', BatchTransferView.as_view(), name='transfer_batch'),
+    
+    # Transaction API's URL
+    path('transactions', TransactionListView.as_view(), name='transactions'),
+    path('transactions/export', TransactionExportView.as_view(), name='transactions_export'),
+    path('transactions/summary', TransactionSummaryView.as_view(), name='transactions_summary'),
+
+    # Admin API's URL
+    path('admin/users/provision', UserProvisionView.as_view(), name='users_provision'),
+
+    # Metrics API's URL (Prometheus text format)
+    path('metrics', MetricsView.as_view(), name='metrics'),
+
+    # Async API's URL (served natively when running under ASGI)
+    path('async/wallet', AsyncWalletView.as_view(), name='async_wallet'),
+    path('async/transfer', AsyncTransferView.as_view(), name='async_transfer'),
+    path('async/transactions', AsyncTransactionListView.as_view(), name='async_transactions'),
+]
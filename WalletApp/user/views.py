@@ -1,327 +1,503 @@
-from django.shortcuts import render
-from rest_framework.views import APIView
-from .serializers import *
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.response import Response
-from rest_framework import status, permissions
-from .response_handler import ResponseHandler
-from .models import User, Wallet, Transaction
-from datetime import datetime
-from django.utils import timezone
-from django.db import transaction
-import requests
-from decimal import Decimal, ROUND_DOWN
-from .pagination import TransactionListPagination
-from rest_framework.generics import ListAPIView
-from django.db.models import Q
-from decouple import config 
-
-EXCHANGE_API = config('EXCHANGE_API')
-
-# Create your views here.
-
-class AuthUserLoginView(APIView):
-    serializer_class = LoginSerializer
-    permission_classes = [AllowAny]
-    response_handler = ResponseHandler()
-    
-    def post(self, request):
-        try:
-            serializer = self.serializer_class(data=request.data)
-            if serializer.is_valid():
-                response_dict, status_code = self.response_handler.success(
-                    data=serializer.data,
-                    msg="User login successfully.",
-                )
-                return Response(
-                    response_dict,
-                    status=status_code,
-                )
-            else:
-                response_dict, status_code = self.response_handler.error(
-                    data=serializer.errors,
-                    msg="Your username or password is wrong.",
-                )
-                return Response(
-                    response_dict,
-                    status=status_code,
-                )
-        except Exception as e:
-            print(f"Exception in AuthUserLoginView: \n {e}")
-            response_dict, status_code = self.response_handler.failure(
-                data=None, error=None, msg="Something went wrong."
-            )
-            return Response(
-                response_dict,
-                status=status_code,
-            )
-
-class AuthUserRegisterView(APIView):
-    serialize_class = RegisterSerializer
-    permission_classes = [AllowAny]
-    response_handler = ResponseHandler()
-
-    def post(self, request):
-        try:
-            serializer = self.serialize_class(data=request.data,context={'request': request})
-            if serializer.is_valid():
-                serializer.save()
-                response_dict, status_code = self.response_handler.success(
-                    data=serializer.data,
-                    msg="User Register successfully.",
-                )
-                return Response(
-                    response_dict,
-                    status=status_code,
-                )
-            else:
-                response_dict, status_code = self.response_handler.error(
-                    data=serializer.errors,
-                    msg="Your username or password is wrong.",
-                )
-                return Response(
-                    response_dict,
-                    status=status_code,
-                )
-        except Exception as e:
-            print(f"Exception in AuthUserRegisterView: \n {e}")
-            response_dict, status_code = self.response_handler.error(
-                msg=str(e),
-            )
-            return Response(
-                response_dict,
-                status=status_code,
-            )
-
-class WalletView(APIView):
-    permission_classes = [IsAuthenticated]
-    response_handler = ResponseHandler()
-    serializer_class = WalletSerializer
-
-    def get(self, request):
-        try:
-            wallet = Wallet.objects.get(user=request.user)
-            serializer = self.serializer_class(wallet)
-            response_dict, status_code = self.response_handler.success(
-                data=serializer.data,
-                msg="Wallet fetched successfully.",
-            )
-            return Response(response_dict, status=status_code)
-        except Wallet.DoesNotExist:
-            response_dict, status_code = self.response_handler.error(
-                data=None, error="Wallet not found.", msg="Wallet not found."
-            )
-            return Response(response_dict, status=status_code)
-        except Exception as e:
-            print(f"Exception in WalletView: \n {e}")
-            response_dict, status_code = self.response_handler.failure(
-                data=None, error=str(e), msg="Something went wrong."
-            )
-            return Response(response_dict, status=status_code)
-
-class TransferView(APIView):
-    serialize_class = TransferSerializer
-    permission_classes = [IsAuthenticated]
-    response_handler = ResponseHandler()
-
-    def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
-
-    def get_exchange_rate(self, amount, from_currency, to_currency):
-        if from_currency == to_currency:
-            return Decimal("1.0")
-        try:
-            response = requests.get(f'{EXCHANGE_API}?amount={amount}&from={from_currency}&to={to_currency}')
-            response.raise_for_status()
-            rate = response.json()['rates'][to_currency]
-            return Decimal(str(rate)) / Decimal(str(amount))
-        except:
-            raise Exception("Failed to fetch exchange rate")
-
-    def post(self, request):
-        serializer = self.serialize_class(data=request.data)
-        if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-        receiver_email = serializer.validated_data['receiver_email']
-        amount = Decimal(str(serializer.validated_data['amount']))
-        from_currency = serializer.validated_data['from_currency'].upper()
-        to_currency = serializer.validated_data['to_currency'].upper()
-
-        try:
-            receiver = User.objects.get(email=receiver_email)
-            sender_wallet = Wallet.objects.get(user=request.user)
-            receiver_wallet = Wallet.objects.get(user=receiver)
-
-            # Convert wallet balances to Decimal before operations
-            sender_usd_balance = Decimal(str(sender_wallet.usd_balance))
-            sender_inr_balance = Decimal(str(sender_wallet.balance))
-            receiver_usd_balance = Decimal(str(receiver_wallet.usd_balance))
-            receiver_inr_balance = Decimal(str(receiver_wallet.balance))
-
-            # Validate balance
-            if from_currency == 'USD':
-                if sender_wallet.usd_balance < amount:
-                    response_dict, status_code = self.response_handler.error(
-                        data=None, error={}, msg="Insufficient USD balance."
-                    )
-                    return Response(response_dict, status=status_code)
-            else:
-                if sender_wallet.balance < amount:
-                    response_dict, status_code = self.response_handler.error(
-                        data=None, error={}, msg=f"Insufficient {from_currency} balance."
-                    )
-                    return Response(response_dict, status=status_code)
-
-            exchange_rate = self.get_exchange_rate(amount, from_currency, to_currency)
-            converted_amount = (amount * exchange_rate).quantize(Decimal('0.01'), rounding=ROUND_DOWN)
-
-            with transaction.atomic():
-                # Deduct from sender
-                if from_currency == 'USD':
-                    if sender_usd_balance < amount:
-                        response_dict, status_code = self.response_handler.error(
-                            data=None, error={}, msg="Insufficient USD balance."
-                        )
-                        return Response(response_dict, status=status_code)
-                    sender_wallet.usd_balance = sender_usd_balance - amount
-                else:
-                    if sender_inr_balance < amount:
-                        response_dict, status_code = self.response_handler.error(
-                            data=None, error={}, msg=f"Insufficient {from_currency} balance."
-                        )
-                        return Response(response_dict, status=status_code)
-                    sender_wallet.balance = sender_inr_balance - amount
-                sender_wallet.save()
-
-                # Credit to receiver
-                if to_currency == 'USD':
-                    receiver_wallet.usd_balance = receiver_usd_balance + converted_amount
-                else:
-                    receiver_wallet.balance = receiver_inr_balance + converted_amount
-                receiver_wallet.save()
-
-                ip_address = self.get_client_ip(request)
-
-                # Log sender transaction
-                Transaction.objects.create(
-                    sender=request.user,
-                    receiver=receiver,
-                    amount=amount,
-                    from_currency=from_currency,
-                    to_currency=to_currency,
-                    exchange_rate=exchange_rate,
-                    transaction_type='SENT',
-                    ip_address=ip_address
-                )
-
-                # Log receiver transaction
-                Transaction.objects.create(
-                    sender=request.user,
-                    receiver=receiver,
-                    amount=converted_amount,
-                    from_currency=from_currency,
-                    to_currency=to_currency,
-                    exchange_rate=exchange_rate,
-                    transaction_type='RECEIVED',
-                    ip_address=ip_address
-                )
-
-            response_dict, status_code = self.response_handler.success(
-                data={},
-                msg="Transfer successfully.",
-            )
-            return Response(
-                response_dict,
-                status=status_code,
-            )
-
-        except User.DoesNotExist:
-            response_dict, status_code = self.response_handler.error(
-                data=None, error=str(e), msg="Receiver not found"
-            )
-            return Response(response_dict, status=status_code)
-        except Wallet.DoesNotExist:
-            response_dict, status_code = self.response_handler.error(
-                data=None, error=str(e), msg="Wallet not found."
-            )
-            return Response(response_dict, status=status_code)
-        except Exception as e:
-            response_dict, status_code = self.response_handler.failure(
-                data=None, error=str(e), 
-            )
-            return Response(response_dict, status=status_code)
-
-class TransactionListView(ListAPIView): 
-    permission_classes = (IsAuthenticated,)
-    response_handler = ResponseHandler()
-    serializer_class = TransactionListSerializer
-    
-    # Pagination settings
-    pagination_class = TransactionListPagination
-    
-    def list(self, request, *args, **kwargs):
-        try:
-            queryset = Transaction.objects.filter(Q(sender=request.user) | Q(receiver=request.user))
-            # Type Filtering 
-            type_filter = self.request.query_params.get('type')
-            if type_filter in ['sent', 'received']:
-                queryset = queryset.filter(transaction_type=type_filter.upper())
-            else:
-                queryset = queryset
-
-            # Date Filtering 
-            date_from = request.query_params.get('date_from')
-            date_to = request.query_params.get('date_to')
-            if date_from:
-                try:
-                    queryset = queryset.filter(created_at__gte=datetime.strptime(date_from, '%Y-%m-%d'))
-                except ValueError:
-                    response_dict, status_code = self.response_handler.error(
-                        data=None, error=str(e), msg="Invalid date_from format."
-                    )
-                    return Response(response_dict, status=status_code)
-            if date_to:
-                try:
-                    queryset = queryset.filter(created_at__lte=datetime.strptime(date_to, '%Y-%m-%d'))
-                except ValueError:
-                    response_dict, status_code = self.response_handler.error(
-                        data=None, error=str(e), msg="Invalid date_from format."
-                    )
-                    return Response(response_dict, status=status_code)
-
-            # Getting page and page_size dynamically from request query params
-            page = request.query_params.get('page', 1)  # Default to page 1 if not provided
-            per_page = request.query_params.get('per_page', 10)  # Default to 10 if not provided
-
-            # Use pagination to limit the queryset
-            page_size =  10
-            # page_size = int(per_page) if per_page.isdigit() else 10
-            paginator = self.pagination_class()
-            paginator.page_size = page_size  # Override the default page size
-
-            # Apply pagination
-            page = paginator.paginate_queryset(queryset, request)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return paginator.get_paginated_response(serializer.data)
-            else:
-                # If no pagination is needed (when queryset is small)
-                serializer = self.get_serializer(queryset, many=True)
-                response_dict, status_code = self.response_handler.success(
-                    data=serializer.data,
-                    msg="No pagination applied (all data fetched).",
-                )
-                return Response(response_dict, status=status_code)
-        
-        except Exception as e:
-            print(f"Exception in TransactionListView List: \n {e}")
-            response_dict, status_code = self.response_handler.failure(
-                data=None, error=str(e), msg="Something went wrong."
-            )
-            return Response(response_dict, status=status_code)
+from django.shortcuts import render
+from rest_framework.views import APIView
+from .serializers import *
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework import status, permissions
+from .response_handler import ResponseHandler
+from .models import User, Wallet, Transaction
+from datetime import datetime, timedelta
+from django.utils import timezone
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db import transaction
+from .pagination import TransactionListPagination, TransactionCursorPagination
+from . import exports, idempotency, metrics, money, provisioning, summaries, throttling, transfers, wallet_cache
+from .routers import reads_from_replica
+import hmac
+import io
+from rest_framework.generics import ListAPIView
+from rest_framework.exceptions import NotFound
+from django.db.models import Q
+from . import exchange
+from .authentication import invalidate_user
+from rest_framework_simplejwt import views as jwt_views
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Create your views here.
+
+class AuthUserLoginView(APIView):
+    serializer_class = LoginSerializer
+    permission_classes = [AllowAny]
+    response_handler = ResponseHandler()
+    throttle_scope = 'login'
+    
+    def post(self, request):
+        try:
+            serializer = self.serializer_class(data=request.data)
+            if serializer.is_valid():
+                response_dict, status_code = self.response_handler.success(
+                    data=serializer.data,
+                    msg="User login successfully.",
+                )
+                return Response(
+                    response_dict,
+                    status=status_code,
+                )
+            else:
+                response_dict, status_code = self.response_handler.error(
+                    data=serializer.errors,
+                    msg="Your username or password is wrong.",
+                )
+                return Response(
+                    response_dict,
+                    status=status_code,
+                )
+        except Exception as e:
+            print(f"Exception in AuthUserLoginView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=None, msg="Something went wrong."
+            )
+            return Response(
+                response_dict,
+                status=status_code,
+            )
+
+class AuthUserRegisterView(APIView):
+    serialize_class = RegisterSerializer
+    permission_classes = [AllowAny]
+    response_handler = ResponseHandler()
+
+    def post(self, request):
+        try:
+            serializer = self.serialize_class(data=request.data,context={'request': request})
+            if serializer.is_valid():
+                serializer.save()
+                response_dict, status_code = self.response_handler.success(
+                    data=serializer.data,
+                    msg="User Register successfully.",
+                )
+                return Response(
+                    response_dict,
+                    status=status_code,
+                )
+            else:
+                response_dict, status_code = self.response_handler.error(
+                    data=serializer.errors,
+                    msg="Your username or password is wrong.",
+                )
+                return Response(
+                    response_dict,
+                    status=status_code,
+                )
+        except Exception as e:
+            print(f"Exception in AuthUserRegisterView: \n {e}")
+            response_dict, status_code = self.response_handler.error(
+                msg=str(e),
+            )
+            return Response(
+                response_dict,
+                status=status_code,
+            )
+
+class TokenBlacklistView(jwt_views.TokenBlacklistView):
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            token = RefreshToken(request.data['refresh'], verify=False)
+            invalidate_user(token[api_settings.USER_ID_CLAIM])
+        return response
+
+class WalletView(APIView):
+    permission_classes = [IsAuthenticated]
+    response_handler = ResponseHandler()
+    serializer_class = WalletSerializer
+
+    @reads_from_replica
+    def get(self, request):
+        try:
+            data = wallet_cache.get_wallet_data(
+                request.user.pk,
+                load=lambda: dict(self.serializer_class(
+                    {'user': request.user.pk, 'balances': Wallet.objects.balances_of(request.user.pk)}
+                ).data),
+            )
+            response_dict, status_code = self.response_handler.success(
+                data=data,
+                msg="Wallet fetched successfully.",
+            )
+            return Response(response_dict, status=status_code)
+        except Wallet.DoesNotExist:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error="Wallet not found.", msg="Wallet not found."
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in WalletView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e), msg="Something went wrong."
+            )
+            return Response(response_dict, status=status_code)
+
+class TransferView(APIView):
+    serialize_class = TransferSerializer
+    permission_classes = [IsAuthenticated]
+    response_handler = ResponseHandler()
+    throttle_scope = 'transfer'
+
+    def get_client_ip(self, request):
+        return throttling.get_client_ip(request)
+
+    def get_exchange_rate(self, from_currency, to_currency):
+        return exchange.get_exchange_rate(from_currency, to_currency)
+
+    def post(self, request):
+        with throttling.transfer_slots.slot():
+            key = request.headers.get(idempotency.HEADER)
+            if key:
+                return idempotency.run(request, key, self.transfer)
+            return self.transfer(request)
+
+    def transfer(self, request):
+        serializer = self.serialize_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        receiver_email = serializer.validated_data['receiver_email']
+        amount = serializer.validated_data['amount']
+        from_currency = serializer.validated_data['from_currency']
+        to_currency = serializer.validated_data['to_currency']
+
+        try:
+            receiver = User.objects.get(email=receiver_email)
+
+            exchange_rate = self.get_exchange_rate(from_currency, to_currency)
+            converted_amount = money.convert(amount, exchange_rate)
+            if converted_amount <= 0:
+                response_dict, status_code = self.response_handler.error(
+                    data=None, error=None, msg="Amount is too small to convert."
+                )
+                return Response(response_dict, status=status_code)
+
+            transfers.execute_transfer(
+                sender=request.user,
+                receiver=receiver,
+                amount=amount,
+                converted_amount=converted_amount,
+                from_currency=from_currency,
+                to_currency=to_currency,
+                exchange_rate=exchange_rate,
+                ip_address=self.get_client_ip(request),
+            )
+
+            response_dict, status_code = self.response_handler.success(
+                data={},
+                msg="Transfer successfully.",
+            )
+            return Response(
+                response_dict,
+                status=status_code,
+            )
+
+        except transfers.InsufficientBalance as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error={}, msg=str(e)
+            )
+            return Response(response_dict, status=status_code)
+        except User.DoesNotExist as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="Receiver not found"
+            )
+            return Response(response_dict, status=status_code)
+        except Wallet.DoesNotExist as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="Wallet not found."
+            )
+            return Response(response_dict, status=status_code)
+        except exchange.ExchangeRateError as e:
+            response_dict, status_code = self.response_handler.exception(
+                data=None, error=str(e), msg="Exchange rate is currently unavailable.",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e), 
+            )
+            return Response(response_dict, status=status_code)
+
+class BatchTransferView(TransferView):
+    serialize_class = BatchTransferSerializer
+
+    def transfer(self, request):
+        serializer = self.serialize_class(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = transfers.execute_batch_transfer(
+                sender=request.user,
+                items=serializer.validated_data['transfers'],
+                ip_address=self.get_client_ip(request),
+                get_exchange_rate=self.get_exchange_rate,
+            )
+            succeeded = sum(1 for result in results if result['status'] == 'success')
+            response_dict, status_code = self.response_handler.success(
+                data={
+                    'succeeded': succeeded,
+                    'failed': len(results) - succeeded,
+                    'results': results,
+                },
+                msg="Batch transfer processed.",
+            )
+            return Response(response_dict, status=status_code)
+        except Wallet.DoesNotExist as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="Wallet not found."
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in BatchTransferView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e),
+            )
+            return Response(response_dict, status=status_code)
+
+class TransactionListView(ListAPIView): 
+    permission_classes = (IsAuthenticated,)
+    response_handler = ResponseHandler()
+    serializer_class = TransactionListSerializer
+    
+    # Pagination settings
+    pagination_class = TransactionListPagination
+    cursor_pagination_class = TransactionCursorPagination
+    
+    @reads_from_replica
+    def list(self, request, *args, **kwargs):
+        try:
+            # Type Filtering 
+            type_filter = self.request.query_params.get('type')
+            if type_filter in ['sent', 'received']:
+                queryset = Transaction.objects.history(request.user, type_filter.upper())
+            else:
+                queryset = Transaction.objects.history(request.user)
+
+            # Date Filtering 
+            date_from = request.query_params.get('date_from')
+            date_to = request.query_params.get('date_to')
+            if date_from:
+                try:
+                    queryset = queryset.filter(created_at__gte=datetime.strptime(date_from, '%Y-%m-%d'))
+                except ValueError as e:
+                    response_dict, status_code = self.response_handler.error(
+                        data=None, error=str(e), msg="Invalid date_from format."
+                    )
+                    return Response(response_dict, status=status_code)
+            if date_to:
+                try:
+                    queryset = queryset.filter(created_at__lte=datetime.strptime(date_to, '%Y-%m-%d'))
+                except ValueError as e:
+                    response_dict, status_code = self.response_handler.error(
+                        data=None, error=str(e), msg="Invalid date_to format."
+                    )
+                    return Response(response_dict, status=status_code)
+
+            # Getting page and page_size dynamically from request query params
+            page = request.query_params.get('page', 1)  # Default to page 1 if not provided
+            per_page = request.query_params.get('per_page', 10)  # Default to 10 if not provided
+
+            # Use pagination to limit the queryset
+            page_size =  10
+            # page_size = int(per_page) if per_page.isdigit() else 10
+            if 'cursor' in request.query_params:
+                paginator = self.cursor_pagination_class()
+            else:
+                paginator = self.pagination_class()
+            paginator.page_size = page_size  # Override the default page size
+
+            # Apply pagination
+            page = paginator.paginate_queryset(queryset, request)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+            else:
+                # If no pagination is needed (when queryset is small)
+                serializer = self.get_serializer(queryset, many=True)
+                response_dict, status_code = self.response_handler.success(
+                    data=serializer.data,
+                    msg="No pagination applied (all data fetched).",
+                )
+                return Response(response_dict, status=status_code)
+        
+        except NotFound as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e.detail), msg="Invalid cursor."
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in TransactionListView List: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e), msg="Something went wrong."
+            )
+            return Response(response_dict, status=status_code)
+
+
+class TransactionSummaryView(APIView):
+    """
+    Sent and received counts and totals per day and currency, read from
+    the daily summaries rather than the transaction history. Defaults to
+    the last 30 days.
+    """
+    permission_classes = (IsAuthenticated,)
+    response_handler = ResponseHandler()
+
+    @reads_from_replica
+    def get(self, request):
+        try:
+            date_to = request.query_params.get('date_to')
+            date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else timezone.localdate()
+            date_from = request.query_params.get('date_from')
+            date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else date_to - timedelta(days=29)
+        except ValueError as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="Invalid date format."
+            )
+            return Response(response_dict, status=status_code)
+        if not timedelta(0) <= date_to - date_from < timedelta(days=summaries.MAX_DAYS):
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=None,
+                msg=f"date_from must be on or before date_to and at most {summaries.MAX_DAYS} days earlier.",
+            )
+            return Response(response_dict, status=status_code)
+
+        type_filter = request.query_params.get('type')
+        transaction_type = type_filter.upper() if type_filter in ['sent', 'received'] else None
+        currency = (request.query_params.get('currency') or '').upper() or None
+
+        try:
+            rows = list(summaries.for_user(request.user, date_from, date_to, currency, transaction_type))
+            response_dict, status_code = self.response_handler.success(
+                data={
+                    'date_from': date_from,
+                    'date_to': date_to,
+                    'days': DailyTransactionSummarySerializer(rows, many=True).data,
+                    'totals': TransactionSummaryTotalSerializer(summaries.totals(rows), many=True).data,
+                },
+                msg="Transaction summary fetched successfully.",
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in TransactionSummaryView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e), msg="Something went wrong."
+            )
+            return Response(response_dict, status=status_code)
+
+
+class TransactionExportView(APIView):
+    permission_classes = (IsAuthenticated,)
+    response_handler = ResponseHandler()
+
+    def get(self, request):
+        output_format = request.query_params.get('output', 'csv')
+        if output_format not in exports.FORMATS:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=None, msg="Invalid output format."
+            )
+            return Response(response_dict, status=status_code)
+
+        try:
+            date_from = request.query_params.get('date_from')
+            date_to = request.query_params.get('date_to')
+            date_from = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+            date_to = datetime.strptime(date_to, '%Y-%m-%d') if date_to else None
+        except ValueError as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="Invalid date format."
+            )
+            return Response(response_dict, status=status_code)
+
+        if request.query_params.get('scope') == 'all':
+            if not request.user.is_staff:
+                response_dict, status_code = self.response_handler.exception(
+                    data=None, error=None, msg="Only staff can export all transactions.",
+                    status_code=status.HTTP_403_FORBIDDEN,
+                )
+                return Response(response_dict, status=status_code)
+            fields, rows = exports.all_rows(date_from, date_to)
+        else:
+            type_filter = request.query_params.get('type')
+            transaction_type = type_filter.upper() if type_filter in ['sent', 'received'] else None
+            fields, rows = exports.user_rows(request.user, transaction_type, date_from, date_to)
+
+        response = StreamingHttpResponse(
+            exports.render(fields, rows, output_format, settings.EXPORT_CHUNK_SIZE),
+            content_type=exports.CONTENT_TYPES[output_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="transactions.{output_format}"'
+        return response
+
+
+class UserProvisionView(APIView):
+    """Create users and wallets in bulk from an uploaded CSV or JSON Lines file."""
+    permission_classes = (IsAdminUser,)
+    parser_classes = (MultiPartParser,)
+    response_handler = ResponseHandler()
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=None, msg="Upload the users as 'file'."
+            )
+            return Response(response_dict, status=status_code)
+        input_format = request.data.get('format') or provisioning.detect_format(upload.name)
+        if input_format not in provisioning.FORMATS:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=None, msg="Invalid format."
+            )
+            return Response(response_dict, status=status_code)
+
+        try:
+            lines = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+            # Hashed in this process: no process pool forked from a web
+            # worker. provision_users hashes large files in parallel.
+            report = provisioning.provision(
+                provisioning.read_records(lines, input_format),
+                chunk_size=settings.PROVISIONING_CHUNK_SIZE,
+                workers=1,
+            )
+            response_dict, status_code = self.response_handler.success(
+                data=report.as_dict(),
+                msg="Users provisioned successfully.",
+            )
+            return Response(response_dict, status=status_code)
+        except UnicodeDecodeError as e:
+            response_dict, status_code = self.response_handler.error(
+                data=None, error=str(e), msg="The file must be UTF-8 encoded."
+            )
+            return Response(response_dict, status=status_code)
+        except Exception as e:
+            print(f"Exception in UserProvisionView: \n {e}")
+            response_dict, status_code = self.response_handler.failure(
+                data=None, error=str(e), msg="Something went wrong."
+            )
+            return Response(response_dict, status=status_code)
+
+
+class MetricsView(APIView):
+    authentication_classes = ()
+    permission_classes = (AllowAny,)
+
+    def get(self, request):
+        # Scrapers authenticate with METRICS_TOKEN; without one nobody can.
+        token = settings.METRICS_TOKEN
+        if not token:
+            return HttpResponse(
+                "Set METRICS_TOKEN to enable metrics.\n", status=status.HTTP_403_FORBIDDEN, content_type='text/plain'
+            )
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            return HttpResponse("Unauthorized\n", status=status.HTTP_401_UNAUTHORIZED, content_type='text/plain')
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
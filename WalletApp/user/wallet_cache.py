@@ -0,0 +1,63 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+from . import routers
+
+GENERATION_KEY = "wallet:generation:{}"
+WALLET_KEY = "wallet:{}:{}"
+
+
+def get_generation(user_id):
+    key = GENERATION_KEY.format(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_wallet_data(user_id, load):
+    """
+    Return the cached wallet representation of `user_id`, calling `load` on
+    a miss. Entries are stored under the user's current generation, so a
+    value loaded concurrently with an invalidation is never served. A
+    value read from a replica after the user's transfer committed isn't
+    stored at all, as the replica may not have the transfer yet. Without
+    a cache shared by all workers every call loads: an invalidation would
+    only reach the worker that handled the transfer.
+    """
+    if not settings.CACHE_SHARED_BY_WORKERS:
+        return load()
+    key = WALLET_KEY.format(user_id, get_generation(user_id))
+    data = cache.get(key)
+    if data is None:
+        data = load()
+        if not routers.read_may_be_stale(user_id):
+            cache.set(key, data, settings.WALLET_CACHE_TIMEOUT)
+    return data
+
+
+async def aget_generation(user_id):
+    key = GENERATION_KEY.format(user_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+async def aget_wallet_data(user_id, load):
+    """Async variant of `get_wallet_data`; `load` is a coroutine function."""
+    if not settings.CACHE_SHARED_BY_WORKERS:
+        return await load()
+    key = WALLET_KEY.format(user_id, await aget_generation(user_id))
+    data = await cache.aget(key)
+    if data is None:
+        data = await load()
+        if not await routers.aread_may_be_stale(user_id):
+            await cache.aset(key, data, settings.WALLET_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate(*user_ids):
+    cache.delete_many([GENERATION_KEY.format(user_id) for user_id in user_ids])